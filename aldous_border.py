@@ -1,23 +1,81 @@
+import math
+from typing import Dict, Optional
 from maze_fun.maze import MazeGrid
+from maze_fun.wilson import Wilson
 
 
 class AldousBorder(MazeGrid):
-    def apply_algorithm(self):
-        frames = [self.create_maze_image()]
+    # Fraction of the enabled cells the random walk visits before switching to Wilson's algorithm, see
+    # apply_hybrid_algorithm. None runs the plain random walk.
+    switch_fraction = None
+    # Random walk steps spent in each phase of the last hybrid run
+    phase_steps = None  # type: Optional[Dict[str, int]]
+
+    def generate_steps(self):
+        if self.switch_fraction is not None:
+            yield from self.generate_hybrid_steps(self.switch_fraction)
+            return
         current_cell = self.get_random_cell()
-        need_to_visit = self.size() - 1
+        need_to_visit = self.enabled_size - 1
 
         while need_to_visit > 0:
-            neighbor = current_cell.get_random_neighbor()
+            neighbor = current_cell.get_random_enabled_neighbor(self.rng)
             if not neighbor.get_links():
-                current_cell.link_two_cells(neighbor)
+                self.link_cells(current_cell, neighbor)
                 need_to_visit -= 1
-                frames.append(self.create_maze_image())
+                yield
             current_cell = neighbor
-        return frames
+
+    def apply_hybrid_algorithm(self, switch_fraction: float=0.5) -> Dict[str, int]:
+        """ Carves a uniform spanning tree maze without rendering, see generate_hybrid_steps.
+        Plain Aldous-Broder spends most of its time wandering over visited cells looking for the last unvisited
+        ones, this finishes in reasonable time on grids where it never would.
+        :return: The number of random walk steps spent in each phase
+        """
+        for _ in self.generate_hybrid_steps(switch_fraction):
+            pass
+        return self.phase_steps
+
+    def generate_hybrid_steps(self, switch_fraction: float):
+        """ Uniform spanning tree maze that explores like Aldous-Broder while unvisited cells are easy to find and
+        finishes like Wilson's algorithm once they are not.
+        Linking every newly entered cell straight to the cell it came from and then handing the partial tree to
+        Wilson's algorithm is biased, since the random walk's partial tree isn't distributed like part of a
+        uniform spanning tree. So the random walk only chooses where the next loop-erased walk starts: whenever
+        it steps onto an unvisited cell, that cell is connected to the tree with a loop-erased random walk, which
+        is short because the cell is next to the tree. Wilson's algorithm is uniform for any order of starting
+        cells, so the maze stays uniform. Once the visited fraction passes switch_fraction, the starting cells
+        are taken straight from the unvisited cells instead of wandering over visited ones to find them.
+        The random walk steps of each phase are counted in phase_steps.
+        """
+        self.phase_steps = {'aldous_broder': 0, 'wilson': 0}
+        unvisited = self.enabled_index.copy()
+        current_cell = self.get_random_cell()
+        unvisited.remove(*current_cell.pos)
+        switch_at = self.enabled_size - math.ceil(switch_fraction * self.enabled_size)
+
+        while len(unvisited) > switch_at:
+            neighbor = current_cell.get_random_enabled_neighbor(self.rng)
+            self.phase_steps['aldous_broder'] += 1
+            if neighbor.pos in unvisited:
+                path, steps = Wilson.loop_erased_walk(neighbor, unvisited, self.rng)
+                self.phase_steps['aldous_broder'] += steps
+                for i, p in enumerate(path[0:-1]):
+                    self.link_cells(p, path[i+1])
+                    unvisited.remove(*p.pos)
+                    yield
+            current_cell = neighbor
+
+        while len(unvisited):
+            cell = self[unvisited[0]]
+            path, steps = Wilson.loop_erased_walk(cell, unvisited, self.rng)
+            self.phase_steps['wilson'] += steps
+            for i, p in enumerate(path[0:-1]):
+                self.link_cells(p, path[i+1])
+                unvisited.remove(*p.pos)
+                yield
 
 
 if __name__ == '__main__':
     grid = AldousBorder(10, 10)
-    frames = grid.apply_algorithm()
-    grid.create_gif_from_frames(frames, 'happy.gif')
\ No newline at end of file
+    grid.create_gif_from_frames(grid.iterate_frames(), 'happy.gif')
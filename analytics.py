@@ -0,0 +1,135 @@
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from maze_fun.bfs import BFSEngine
+
+# Number of passages for every N/S/E/W bitmask
+PASSAGE_COUNTS = np.array([bin(mask).count('1') for mask in range(16)], dtype=np.uint8)
+
+
+class MazeStats(object):
+    """ Quality metrics of a perfect maze, see analyze_passages """
+    def __init__(self, cells: int, diameter: int, diameter_endpoints: Tuple[Tuple[int, int], Tuple[int, int]],
+                 border_diameter: int, border_endpoints: Optional[Tuple[Tuple[int, int], Tuple[int, int]]],
+                 degree_histogram: List[int], longest_corridor: int):
+        self.cells = cells
+        self.diameter = diameter
+        self.diameter_endpoints = diameter_endpoints
+        self.border_diameter = border_diameter
+        self.border_endpoints = border_endpoints
+        # degree_histogram[n] is the number of cells with n passages
+        self.degree_histogram = degree_histogram
+        self.dead_ends = degree_histogram[1]
+        self.longest_corridor = longest_corridor
+        # Share of the cells that are part of a corridor rather than a dead end or a junction. Mazes with long
+        # winding passages (a high "river") score close to 1.
+        self.river_factor = degree_histogram[2] / cells if cells else 0.0
+
+    def to_dict(self) -> Dict:
+        return dict(self.__dict__)
+
+
+def get_degree_array(passages: np.ndarray) -> np.ndarray:
+    return PASSAGE_COUNTS[passages & 15]
+
+
+def analyze_passages(passages: np.ndarray, enabled: Optional[np.ndarray]=None) -> MazeStats:
+    """ Computes every metric of MazeStats with one BFS and one pass over its levels in each direction.
+    The maze has to be a tree, only the cells connected to the first dead end are measured.
+    :param passages: N/S/E/W passage bitmask, see array_grid
+    :param enabled: Mask of the enabled cells, all cells by default
+    """
+    rows, cols = passages.shape
+    size = rows * cols
+    enabled = np.ones((rows, cols), dtype=bool) if enabled is None else enabled
+    degrees = get_degree_array(passages)
+    degree_histogram = np.bincount(degrees[enabled], minlength=5).tolist()
+    cells = int(enabled.sum())
+    if cells == 0:
+        return MazeStats(0, 0, None, 0, None, degree_histogram, 0)
+
+    # Rooting the tree at a dead end keeps every corridor on a single line from the root down
+    dead_ends = np.flatnonzero((degrees == 1) & enabled)
+    root = int(dead_ends[0]) if len(dead_ends) else int(np.flatnonzero(enabled)[0])
+    distances, parents = BFSEngine(passages).search([divmod(root, cols)], with_parents=True)
+    distances, parents = distances.ravel(), parents.ravel()
+    # Every node comes after its parent in BFS order
+    order = np.argsort(distances, kind='stable')
+    order = order[np.searchsorted(distances[order], 0):].tolist()
+    parents = parents.tolist()
+
+    on_border = np.zeros((rows, cols), dtype=bool)
+    on_border[[0, -1]] = True
+    on_border[:, [0, -1]] = True
+    reached = distances >= 0
+    all_paths, border_paths = get_longest_terminal_paths(order, parents, size, [reached, reached & on_border.ravel()])
+    return MazeStats(cells, all_paths[0], as_positions(all_paths[1], cols), border_paths[0],
+                     as_positions(border_paths[1], cols), degree_histogram,
+                     get_longest_corridor(order, parents, (degrees.ravel() == 2).tolist()))
+
+
+def as_positions(endpoints: Optional[Tuple[int, int]], cols: int) -> Optional[Tuple[Tuple[int, int], Tuple[int, int]]]:
+    if endpoints is None:
+        return None
+    return divmod(endpoints[0], cols), divmod(endpoints[1], cols)
+
+
+def get_longest_terminal_paths(order: List[int], parents: List[int], size: int,
+                               terminal_masks: List[np.ndarray]) -> List[Tuple[int, Optional[Tuple[int, int]]]]:
+    """ Finds the longest path between two terminals of a tree for several sets of terminals at once, in a single
+    pass over the nodes from the leaves up. Every node keeps its two deepest terminals from different child
+    subtrees (itself included at depth 0). A terminal at depth d below a node is packed into one int as
+    d * size + terminal, so comparing keys compares depths and remembers which terminal it is.
+    :param order: Flat indices of the reached nodes, every node after its parent
+    :param parents: Flat index of the parent of every node, negative for the root
+    :param terminal_masks: Flat bool masks of the nodes that may end a path
+    :return: (length, (first, second)) per mask, the endpoints are None when the mask has no terminal
+    """
+    bests = [np.where(terminals, np.arange(size, dtype=np.int64), -1).tolist() for terminals in terminal_masks]
+    seconds = [[-1] * size for _ in terminal_masks]
+    tables = list(zip(bests, seconds))
+    for node in reversed(order):
+        parent = parents[node]
+        if parent < 0:
+            continue
+        for best, second in tables:
+            key = best[node]
+            if key < 0:
+                continue
+            key += size
+            if key > best[parent]:
+                second[parent] = best[parent]
+                best[parent] = key
+            elif key > second[parent]:
+                second[parent] = key
+
+    results = []
+    for best, second in tables:
+        best, second = np.array(best, dtype=np.int64), np.array(second, dtype=np.int64)
+        if best.max() < 0:
+            results.append((0, None))
+            continue
+        lengths = np.where(second >= 0, best // size + second // size, -1)
+        node = int(np.argmax(lengths))
+        if lengths[node] < 0:
+            # A single terminal
+            terminal = int(np.argmax(best))
+            results.append((0, (terminal, terminal)))
+            continue
+        results.append((int(lengths[node]), (int(best[node] % size), int(second[node] % size))))
+    return results
+
+
+def get_longest_corridor(order: List[int], parents: List[int], corridors: List[bool]) -> int:
+    """ Longest run of connected cells that have exactly two passages. Below a dead end root every such run is a
+    single line down the tree, so its length is counted going down the tree in BFS order.
+    """
+    run_lengths = [0] * len(corridors)
+    longest = 0
+    for node in order:
+        if corridors[node]:
+            parent = parents[node]
+            run_length = run_lengths[parent] + 1 if parent >= 0 else 1
+            run_lengths[node] = run_length
+            if run_length > longest:
+                longest = run_length
+    return longest
@@ -0,0 +1,47 @@
+import random
+import numpy as np
+from piyush_utils.base_test_case import BaseTestCase
+from maze_fun.analytics import analyze_passages
+from maze_fun.maze import MazeGrid
+from maze_fun.recursive_backtracker import RecursiveBackTracker
+
+
+class AnalyticsTest(BaseTestCase):
+    def test_snake(self):
+        # 3x4 snake: along the top row, down the east side, back along the middle row and down to the bottom row
+        maze = MazeGrid(3, 4, array_backed=True)
+        path = [(0, 0), (0, 1), (0, 2), (0, 3), (1, 3), (1, 2), (1, 1), (1, 0), (2, 0), (2, 1), (2, 2), (2, 3)]
+        for node, next_node in zip(path, path[1:]):
+            maze.link_cells(maze[node], maze[next_node])
+        stats = maze.get_stats()
+        self.assertEqual(stats.diameter, 11)
+        self.assertEqual(set(stats.diameter_endpoints), {(0, 0), (2, 3)})
+        self.assertEqual(stats.border_diameter, 11)
+        self.assertEqual(stats.dead_ends, 2)
+        self.assertEqual(stats.degree_histogram, [0, 2, 10, 0, 0])
+        self.assertEqual(stats.longest_corridor, 10)
+        self.assertAlmostEqual(stats.river_factor, 10 / 12)
+
+    def test_matches_bfs(self):
+        for seed in range(5):
+            random.seed(seed)
+            maze = RecursiveBackTracker(6, 7, array_backed=True)
+            maze.disable_cell(2, 3)
+            maze.generate()
+            stats = maze.get_stats()
+            first, second = stats.diameter_endpoints
+            self.assertEqual(stats.diameter, maze.generate_bfs_distance_array([first])[0][second])
+            furthest_node, _ = maze.determine_nodes_with_greatest_separation()
+            self.assertEqual(stats.diameter, maze.get_distance_array(furthest_node).max())
+            self.assertEqual(stats.dead_ends, maze.number_of_dead_ends())
+            self.assertEqual(sum(stats.degree_histogram), 41)
+            first, second = stats.border_endpoints
+            for row, col in [first, second]:
+                self.assertTrue(row in (0, 5) or col in (0, 6))
+            self.assertEqual(stats.border_diameter, maze.generate_bfs_distance_array([first])[0][second])
+            self.assertLessEqual(stats.border_diameter, stats.diameter)
+
+    def test_single_cell(self):
+        stats = analyze_passages(np.zeros((1, 1), dtype=np.uint8))
+        self.assertEqual((stats.diameter, stats.diameter_endpoints), (0, ((0, 0), (0, 0))))
+        self.assertEqual((stats.dead_ends, stats.longest_corridor), (0, 0))
@@ -0,0 +1,136 @@
+import numpy as np
+from typing import List, Optional
+from maze_fun.cell import Cell, StructureVersion
+
+# Passage bits stored per cell in ArrayGrid.passages
+NORTH, SOUTH, EAST, WEST = 1, 2, 4, 8
+OPPOSITE = {NORTH: SOUTH, SOUTH: NORTH, EAST: WEST, WEST: EAST}
+OFFSETS = {NORTH: (-1, 0), SOUTH: (1, 0), EAST: (0, 1), WEST: (0, -1)}
+
+
+class ArrayGrid(object):
+    """ Stores the link and enabled state of a whole grid in two numpy arrays instead of one Cell per position.
+    passages holds a N/S/E/W bitmask per cell and enabled holds the mask of enabled cells.
+    """
+    def __init__(self, rows: int, cols: int):
+        self.rows = rows
+        self.cols = cols
+        self.passages = np.zeros((rows, cols), dtype=np.uint8)
+        self.enabled = np.ones((rows, cols), dtype=bool)
+        self.structure_version = StructureVersion()
+
+    def in_bounds(self, row: int, col: int) -> bool:
+        return 0 <= row < self.rows and 0 <= col < self.cols
+
+    def cell(self, row: int, col: int) -> 'CellView':
+        return CellView(self, row, col)
+
+
+class CellView(Cell):
+    """ A lightweight stand in for Cell that reads and writes its state from an ArrayGrid.
+    Views are created on demand, so two views of the same position compare and hash equal.
+    """
+    def __init__(self, grid: ArrayGrid, row_num: int, col_num: int):
+        self.grid = grid
+        self.row_num = row_num
+        self.col_num = col_num
+
+    def neighbor(self, direction: int) -> Optional['CellView']:
+        d_row, d_col = OFFSETS[direction]
+        row, col = self.row_num + d_row, self.col_num + d_col
+        if not self.grid.in_bounds(row, col):
+            return None
+        return CellView(self.grid, row, col)
+
+    @property
+    def north(self) -> Optional['CellView']:
+        return self.neighbor(NORTH)
+
+    @property
+    def south(self) -> Optional['CellView']:
+        return self.neighbor(SOUTH)
+
+    @property
+    def left(self) -> Optional['CellView']:
+        return self.neighbor(WEST)
+
+    @property
+    def right(self) -> Optional['CellView']:
+        return self.neighbor(EAST)
+
+    @property
+    def structure_version(self) -> StructureVersion:
+        return self.grid.structure_version
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.grid.enabled[self.row_num, self.col_num])
+
+    def disable_cell(self):
+        self.grid.enabled[self.row_num, self.col_num] = False
+        self.bump_structure_version()
+
+    def enable_cell(self):
+        self.grid.enabled[self.row_num, self.col_num] = True
+        self.bump_structure_version()
+
+    def direction_to(self, other: Cell) -> int:
+        offset = (other.row_num - self.row_num, other.col_num - self.col_num)
+        for direction, direction_offset in OFFSETS.items():
+            if direction_offset == offset:
+                return direction
+        raise Exception('Cells {0} and {1} are not adjacent'.format(self.pos, other.pos))
+
+    def link_two_cells(self, other: Cell, bidirection=True):
+        self.grid.passages[self.row_num, self.col_num] |= self.direction_to(other)
+        if bidirection:
+            other.link_two_cells(self, False)
+            self.bump_structure_version()
+
+    def unlink_two_cells(self, other: Cell, bidirection=True):
+        direction = self.direction_to(other)
+        if not self.grid.passages[self.row_num, self.col_num] & direction:
+            raise KeyError(other)
+        self.grid.passages[self.row_num, self.col_num] &= ~np.uint8(direction)
+        if bidirection:
+            other.unlink_two_cells(self, False)
+            self.bump_structure_version()
+
+    @property
+    def links(self) -> List['CellView']:
+        mask = self.grid.passages[self.row_num, self.col_num]
+        return [self.neighbor(direction) for direction in OFFSETS if mask & direction]
+
+    def get_links(self) -> List['CellView']:
+        return self.links
+
+    def is_linked(self, other: Cell) -> bool:
+        offset = (other.row_num - self.row_num, other.col_num - self.col_num)
+        for direction, direction_offset in OFFSETS.items():
+            if direction_offset == offset:
+                return bool(self.grid.passages[self.row_num, self.col_num] & direction)
+        return False
+
+
+def passages_from_south_east(south: np.ndarray, east: np.ndarray) -> np.ndarray:
+    """ Builds the symmetric N/S/E/W bitmask from the two arrays that mark which cells open to the south and east.
+    :param south: (rows, cols) bool array, True when a cell is linked to the cell below it
+    :param east: (rows, cols) bool array, True when a cell is linked to the cell on its right
+    :return: (rows, cols) uint8 passage array
+    """
+    south = np.asarray(south, dtype=bool).view(np.uint8)
+    east = np.asarray(east, dtype=bool).view(np.uint8)
+    passages = south * np.uint8(SOUTH)
+    passages |= east * np.uint8(EAST)
+    passages[1:] |= south[:-1] * np.uint8(NORTH)
+    passages[:, 1:] |= east[:, :-1] * np.uint8(WEST)
+    return passages
+
+
+def random_bits(rng: np.random.Generator, rows: int, cols: int) -> np.ndarray:
+    """ Draws a (rows, cols) array of fair coin flips, one random bit per cell rather than one float.
+    Every row takes whole 64 bit words straight from the bit generator, so drawing the rows in one call or in
+    several gives the same bits.
+    """
+    words = rng.bit_generator.random_raw(rows * ((cols + 63) // 64)).reshape(rows, -1)
+    return np.unpackbits(words.view(np.uint8), axis=1, count=cols).view(bool)
@@ -0,0 +1,58 @@
+import random
+from piyush_utils.base_test_case import BaseTestCase
+from maze_fun.array_grid import CellView, NORTH, SOUTH, EAST, WEST
+from maze_fun.maze import MazeGrid, Cell
+from maze_fun.side_winder import SideWinder
+from maze_fun.recursive_backtracker import RecursiveBackTracker
+
+
+class ArrayGridTest(BaseTestCase):
+    def test_get_item_returns_view(self):
+        maze = MazeGrid(2, 2, array_backed=True)
+        cell = maze[0, 0]
+        self.assertIsInstance(cell, CellView)
+        self.assertEqual(cell, Cell(0, 0))
+        self.assertEqual(cell.left, None)
+        self.assertEqual(cell.north, None)
+        self.assertEqual(cell.right, Cell(0, 1))
+        self.assertEqual(cell.south, Cell(1, 0))
+        self.assertIsNone(maze[2, 0])
+
+    def test_link_two_cells(self):
+        maze = MazeGrid(2, 2, array_backed=True)
+        maze[0, 0].link_two_cells(maze[0, 1])
+        maze[0, 0].link_two_cells(maze[1, 0])
+        self.assertEqual(maze.grid.passages[0, 0], EAST | SOUTH)
+        self.assertEqual(maze.grid.passages[0, 1], WEST)
+        self.assertEqual(maze.grid.passages[1, 0], NORTH)
+        self.assertTrue(maze[0, 1].is_linked(maze[0, 0]))
+        self.assertFalse(maze[1, 1].is_linked(maze[0, 0]))
+        self.assertEqual(set(maze[0, 0].get_links()), {Cell(0, 1), Cell(1, 0)})
+
+        maze[1, 0].unlink_two_cells(maze[0, 0])
+        self.assertEqual(maze.grid.passages[0, 0], EAST)
+        self.assertEqual(maze.grid.passages[1, 0], 0)
+
+    def test_link_non_adjacent_cells(self):
+        maze = MazeGrid(3, 3, array_backed=True)
+        with self.assertRaises(Exception):
+            maze[0, 0].link_two_cells(maze[2, 2])
+
+    def test_same_maze_as_object_grid(self):
+        random.seed(0)
+        object_maze = SideWinder(4, 4)
+        object_maze.apply_algorithm()
+        random.seed(0)
+        array_maze = SideWinder(4, 4, array_backed=True)
+        array_maze.apply_algorithm()
+        self.assertEqual(object_maze.create_maze_string(), array_maze.create_maze_string())
+        self.assertDictEqual(object_maze.generate_bfs_distance_map((3, 0)),
+                             array_maze.generate_bfs_distance_map((3, 0)))
+
+    def test_masked_recursive_backtracker(self):
+        random.seed(1)
+        maze = RecursiveBackTracker(5, 5, array_backed=True)
+        maze.disable_cell(2, 2)
+        maze.apply_algorithm()
+        self.assertEqual(maze[2, 2].get_links(), [])
+        self.assertEqual(len(maze.generate_bfs_distance_map((0, 0))), 24)
@@ -0,0 +1,112 @@
+import random
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional
+from maze_fun.maze import MazeGrid
+from maze_fun.aldous_border import AldousBorder
+from maze_fun.binary_tree import BinaryTree
+from maze_fun.hunt_and_kill import HuntAndKill
+from maze_fun.recursive_backtracker import RecursiveBackTracker
+from maze_fun.side_winder import SideWinder
+from maze_fun.wilson import Wilson
+
+
+def generate_binary_tree(rows: int, cols: int, seed: int) -> MazeGrid:
+    maze = BinaryTree(rows, cols, array_backed=True)
+    maze.apply_vectorized_algorithm(seed)
+    return maze
+
+
+def generate_side_winder(rows: int, cols: int, seed: int) -> MazeGrid:
+    maze = SideWinder(rows, cols, array_backed=True)
+    maze.apply_vectorized_algorithm(seed)
+    return maze
+
+
+def generate_wilson(rows: int, cols: int, seed: int) -> MazeGrid:
+    maze = Wilson(rows, cols, array_backed=True)
+    maze.apply_fast_algorithm(seed)
+    return maze
+
+
+def generate_aldous_broder_wilson(rows: int, cols: int, seed: int) -> MazeGrid:
+    maze = AldousBorder(rows, cols, array_backed=True)
+    maze.rng = random.Random(seed)
+    maze.apply_hybrid_algorithm()
+    return maze
+
+
+def cell_generator(maze_class) -> Callable[[int, int, int], MazeGrid]:
+    """ Generators that carve cell by cell. Every maze gets its own random.Random, so the global random module of
+    the caller is left alone even when the batch runs in process.
+    """
+    def generate(rows: int, cols: int, seed: int) -> MazeGrid:
+        maze = maze_class(rows, cols, array_backed=True)
+        maze.rng = random.Random(seed)
+        maze.generate()
+        return maze
+    return generate
+
+
+ALGORITHMS = {
+    'binary_tree': generate_binary_tree,
+    'side_winder': generate_side_winder,
+    'wilson': generate_wilson,
+    'aldous_broder_wilson': generate_aldous_broder_wilson,
+    'aldous_broder': cell_generator(AldousBorder),
+    'hunt_and_kill': cell_generator(HuntAndKill),
+    'recursive_backtracker': cell_generator(RecursiveBackTracker),
+}  # type: Dict[str, Callable[[int, int, int], MazeGrid]]
+
+
+class BatchSpec(object):
+    def __init__(self, algorithm: str, rows: int, cols: int, count: int, base_seed: int=0,
+                 with_stats: bool=False):
+        if algorithm not in ALGORITHMS:
+            raise Exception('Unknown algorithm {0}, expected one of {1}'.format(algorithm, sorted(ALGORITHMS)))
+        self.algorithm = algorithm
+        self.rows = rows
+        self.cols = cols
+        self.count = count
+        self.base_seed = base_seed
+        self.with_stats = with_stats
+
+    def get_maze_seed(self, index: int) -> int:
+        """ The seed of a maze only depends on the base seed and its index, never on which worker runs it """
+        return int(np.random.SeedSequence([self.base_seed, index]).generate_state(1)[0])
+
+
+class BatchResult(object):
+    def __init__(self, index: int, seed: int, passages: np.ndarray, stats: Optional[Dict[str, int]]=None):
+        self.index = index
+        self.seed = seed
+        # N/S/E/W passage bitmask, see array_grid
+        self.passages = passages
+        self.stats = stats
+
+
+def get_maze_stats(maze: MazeGrid) -> Dict[str, int]:
+    stats = maze.get_stats()
+    return {
+        'dead_ends': stats.dead_ends,
+        'diameter': stats.diameter,
+    }
+
+
+def generate_batch_maze(spec: BatchSpec, index: int) -> BatchResult:
+    seed = spec.get_maze_seed(index)
+    maze = ALGORITHMS[spec.algorithm](spec.rows, spec.cols, seed)
+    stats = get_maze_stats(maze) if spec.with_stats else None
+    return BatchResult(index, seed, maze.get_passage_array(), stats)
+
+
+def generate_batch(spec: BatchSpec, workers: int=1) -> List[BatchResult]:
+    """ Generates spec.count mazes, fanned out over a process pool when workers > 1.
+    Results come back in index order and are the same for any number of workers.
+    """
+    indices = range(spec.count)
+    if workers <= 1:
+        return [generate_batch_maze(spec, index) for index in indices]
+    chunk_size = max(1, spec.count // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(generate_batch_maze, [spec] * spec.count, indices, chunksize=chunk_size))
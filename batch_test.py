@@ -0,0 +1,37 @@
+import random
+import numpy as np
+from piyush_utils.base_test_case import BaseTestCase
+from maze_fun.batch import BatchSpec, generate_batch, ALGORITHMS
+
+
+class BatchTest(BaseTestCase):
+    def test_same_output_for_any_number_of_workers(self):
+        spec = BatchSpec('recursive_backtracker', 6, 5, count=6, base_seed=42, with_stats=True)
+        single = generate_batch(spec, workers=1)
+        parallel = generate_batch(spec, workers=3)
+        self.assertEqual([r.index for r in parallel], list(range(6)))
+        for a, b in zip(single, parallel):
+            self.assertEqual(a.seed, b.seed)
+            self.assertTrue(np.array_equal(a.passages, b.passages))
+            self.assertEqual(a.stats, b.stats)
+        self.assertFalse(np.array_equal(single[0].passages, single[1].passages))
+
+    def test_every_algorithm(self):
+        for algorithm in ALGORITHMS:
+            results = generate_batch(BatchSpec(algorithm, 4, 7, count=2, base_seed=1, with_stats=True))
+            for result in results:
+                self.assertEqual(result.passages.shape, (4, 7))
+                # A perfect maze on 28 cells has 27 passages, each counted from both sides
+                self.assertEqual(int(np.unpackbits(result.passages).sum()), 2 * 27)
+                self.assertGreater(result.stats['diameter'], 0)
+
+    def test_unknown_algorithm(self):
+        with self.assertRaises(Exception):
+            BatchSpec('eller', 4, 4, count=1)
+
+    def test_global_random_state_is_left_alone(self):
+        random.seed(5)
+        state = random.getstate()
+        for algorithm in ALGORITHMS:
+            generate_batch(BatchSpec(algorithm, 4, 4, count=2, base_seed=1), workers=1)
+        self.assertEqual(random.getstate(), state)
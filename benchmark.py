@@ -0,0 +1,253 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from typing import Any, Callable, Dict, List, Optional
+from maze_fun.array_grid import passages_from_south_east
+from maze_fun.batch import ALGORITHMS
+from maze_fun.instrumentation import Instrumentation, profile
+from maze_fun.maze import MazeGrid
+from maze_fun.recursive_backtracker import RecursiveBackTracker
+from maze_fun.wilson import Wilson
+
+DEFAULT_SIZES = [10, 50, 100, 500, 1000, 2000]
+
+
+class BenchmarkCase(object):
+    def __init__(self, name: str, run: Callable[[Any], Any], setup: Callable[[int, int], Any]=None,
+                 max_size: int=2000):
+        """
+        :param run: The timed function, called with whatever setup returned
+        :param setup: Called with (size, seed) before every run and not timed, by default it passes (size, seed) on
+        :param max_size: Largest grid side the case runs at unless asked for explicitly, for the cases that would
+        take minutes or need more memory than a workstation has at 2000x2000
+        """
+        self.name = name
+        self.run = run
+        self.setup = setup or (lambda size, seed: (size, seed))
+        self.max_size = max_size
+
+
+def generator_case(algorithm: str, max_size: int=2000) -> BenchmarkCase:
+    def run(args):
+        size, seed = args
+        ALGORITHMS[algorithm](size, size, seed)
+    return BenchmarkCase('generate_' + algorithm, run, max_size=max_size)
+
+
+def create_maze(size: int, seed: int) -> MazeGrid:
+    """ The maze every non generator case works on """
+    maze = Wilson(size, size, array_backed=True)
+    maze.apply_fast_algorithm(seed)
+    return maze
+
+
+def create_corridor_maze(size: int, seed: int) -> MazeGrid:
+    """ A single corridor snaking through every row, the worst case for anything that works a BFS level at a time
+    since its diameter is the number of cells
+    """
+    east = np.ones((size, size), dtype=bool)
+    east[:, -1] = False
+    south = np.zeros((size, size), dtype=bool)
+    south[0:-1:2, -1] = True
+    south[1:-1:2, 0] = True
+    maze = MazeGrid(size, size, array_backed=True)
+    maze.load_passage_array(passages_from_south_east(south, east))
+    return maze
+
+
+def create_small_cell_maze(size: int, seed: int) -> MazeGrid:
+    """ Same as create_maze, drawn with 10 pixel cells so the images stay in memory at the larger sizes """
+    maze = create_maze(size, seed)
+    maze.default_cell_size = 10
+    maze.maze_wall_width = 2
+    return maze
+
+
+def run_greatest_separation(maze: MazeGrid):
+    maze.distance_cache.clear()
+    maze.determine_nodes_with_greatest_separation()
+
+
+def run_path_video(maze: MazeGrid):
+    with tempfile.TemporaryDirectory() as directory:
+        maze.create_maze_path_frames(os.path.join(directory, 'maze.mp4'))
+
+
+def create_path_video_maze(size: int, seed: int) -> MazeGrid:
+    """ An uncarved maze, create_maze_path_frames animates the carving """
+    maze = RecursiveBackTracker(size, size)
+    maze.rng = random.Random(seed)
+    return maze
+
+
+CASES = [
+    generator_case('binary_tree'),
+    generator_case('side_winder'),
+    generator_case('wilson'),
+    generator_case('aldous_broder_wilson', max_size=500),
+    # Plain Aldous-Broder has to wander until it covers the whole grid
+    generator_case('aldous_broder', max_size=100),
+    generator_case('hunt_and_kill', max_size=500),
+    generator_case('recursive_backtracker', max_size=500),
+    BenchmarkCase('generate_bfs_distance_map', lambda maze: maze.generate_bfs_distance_map((0, 0)), create_maze,
+                  max_size=500),
+    BenchmarkCase('generate_bfs_distance_array', lambda maze: maze.generate_bfs_distance_array([(0, 0)]),
+                  create_maze),
+    BenchmarkCase('generate_bfs_distance_array_corridor', lambda maze: maze.generate_bfs_distance_array([(0, 0)]),
+                  create_corridor_maze),
+    BenchmarkCase('determine_nodes_with_greatest_separation', run_greatest_separation, create_maze),
+    BenchmarkCase('find_path', lambda maze: maze.find_path((0, 0), (maze.rows - 1, maze.cols - 1)), create_maze),
+    BenchmarkCase('get_stats', lambda maze: maze.get_stats(), create_maze),
+    BenchmarkCase('get_stats_corridor', lambda maze: maze.get_stats(), create_corridor_maze),
+    BenchmarkCase('create_maze_string', lambda maze: maze.create_maze_string(), create_maze, max_size=1000),
+    BenchmarkCase('create_maze_image', lambda maze: maze.create_maze_image(), create_small_cell_maze, max_size=1000),
+    BenchmarkCase('create_maze_path_frames', run_path_video, create_path_video_maze, max_size=10),
+]  # type: List[BenchmarkCase]
+
+
+def run_case(case: BenchmarkCase, size: int, seed: int, repeat: int, measure_memory: bool) -> Dict:
+    """ Times repeat runs, each on a fresh setup, and keeps the fastest. Peak memory comes from one extra run
+    under tracemalloc, which slows Python code down too much to time it at the same time.
+    """
+    timings = []
+    for _ in range(repeat):
+        state = case.setup(size, seed)
+        start = time.perf_counter()
+        case.run(state)
+        timings.append(time.perf_counter() - start)
+    result = {'case': case.name, 'size': size, 'seconds': min(timings), 'peak_bytes': None}
+    if measure_memory:
+        state = case.setup(size, seed)
+        tracemalloc.start()
+        try:
+            case.run(state)
+            result['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def run_benchmarks(case_names: Optional[List[str]]=None, sizes: List[int]=DEFAULT_SIZES, seed: int=0,
+                   repeat: int=3, measure_memory: bool=True, ignore_max_size: bool=False,
+                   log: Callable[[str], Any]=None) -> Dict:
+    """
+    :param case_names: Names of the cases to run, all of them by default
+    :return: The report that gets written as JSON
+    """
+    cases = [case for case in CASES if case_names is None or case.name in case_names]
+    unknown = set(case_names or []) - {case.name for case in cases}
+    if unknown:
+        raise Exception('Unknown benchmark cases {0}'.format(sorted(unknown)))
+    results = []
+    for case in cases:
+        for size in sizes:
+            if size > case.max_size and not ignore_max_size:
+                continue
+            result = run_case(case, size, seed, repeat, measure_memory)
+            if log:
+                log(format_result(result))
+            results.append(result)
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'seed': seed,
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def instrument_case(case_name: str, size: int, seed: int=0, profile_path: str=None) -> Dict:
+    """ Runs a case once with instrumentation enabled, and under cProfile when profile_path is given
+    :return: The instrumentation report of the run
+    """
+    cases = [case for case in CASES if case.name == case_name]
+    if not cases:
+        raise Exception('Unknown benchmark case {0}'.format(case_name))
+    state = cases[0].setup(size, seed)
+    with Instrumentation() as instrumentation:
+        if profile_path:
+            with profile(profile_path):
+                cases[0].run(state)
+        else:
+            cases[0].run(state)
+    return instrumentation.get_report()
+
+
+def format_result(result: Dict) -> str:
+    peak = '' if result['peak_bytes'] is None else '{0:10.1f} MB'.format(result['peak_bytes'] / 2 ** 20)
+    return '{0:45s} {1:5d} {2:10.4f} s {3}'.format(result['case'], result['size'], result['seconds'], peak)
+
+
+def compare_reports(report: Dict, baseline: Dict, tolerance: float=0.2, min_seconds: float=0.001) -> List[Dict]:
+    """ Flags every result that got slower, or used more memory, than the baseline by more than the tolerance.
+    Timings under min_seconds in both reports are too noisy to compare.
+    :return: One entry per regression
+    """
+    baseline_results = {(result['case'], result['size']): result for result in baseline['results']}
+    regressions = []
+    for result in report['results']:
+        base = baseline_results.get((result['case'], result['size']))
+        if base is None:
+            continue
+        for metric in ['seconds', 'peak_bytes']:
+            value, base_value = result[metric], base[metric]
+            if value is None or base_value is None:
+                continue
+            if metric == 'seconds' and max(value, base_value) < min_seconds:
+                continue
+            if value > base_value * (1 + tolerance):
+                regressions.append({'case': result['case'], 'size': result['size'], 'metric': metric,
+                                    'baseline': base_value, 'value': value, 'ratio': value / max(base_value, 1e-12)})
+    return regressions
+
+
+def main(argv: List[str]=None) -> int:
+    parser = argparse.ArgumentParser(description='Times the maze generators, solvers and renderers')
+    parser.add_argument('--cases', nargs='+', help='Cases to run, all of them by default')
+    parser.add_argument('--sizes', nargs='+', type=int, default=DEFAULT_SIZES, help='Grid sides to run at')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per case and size, the fastest one counts')
+    parser.add_argument('--no-memory', action='store_true', help='Skip the peak memory measurement')
+    parser.add_argument('--all-sizes', action='store_true', help='Also run cases above their usual max size')
+    parser.add_argument('--output', help='Write the report to this JSON file')
+    parser.add_argument('--compare', help='Baseline JSON report to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed slowdown, 0.2 is 20%%')
+    parser.add_argument('--list', action='store_true', help='List the cases and exit')
+    parser.add_argument('--instrument', action='store_true',
+                        help='Run the first case once at the first size and print its counters and phase timers')
+    parser.add_argument('--profile', help='Same as --instrument, also dumping a cProfile trace to this file')
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for case in CASES:
+            print('{0:45s} up to {1}'.format(case.name, case.max_size))
+        return 0
+    if args.instrument or args.profile:
+        report = instrument_case(args.cases[0] if args.cases else CASES[0].name, args.sizes[0], args.seed,
+                                 args.profile)
+        print(json.dumps(report, indent=2))
+        return 0
+    report = run_benchmarks(args.cases, args.sizes, args.seed, args.repeat, not args.no_memory, args.all_sizes,
+                            log=print)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare_reports(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print('REGRESSION {case} at {size}: {metric} {baseline:.4g} -> {value:.4g} ({ratio:.2f}x)'.format(
+                **regression))
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,46 @@
+import json
+import os
+import tempfile
+from piyush_utils.base_test_case import BaseTestCase
+from maze_fun.benchmark import compare_reports, instrument_case, main, run_benchmarks
+
+
+class BenchmarkTest(BaseTestCase):
+    def test_report(self):
+        report = run_benchmarks(['generate_binary_tree', 'get_stats'], sizes=[4, 8, 5000], repeat=2)
+        # 5000 is above the max size of both cases
+        self.assertEqual([(r['case'], r['size']) for r in report['results']],
+                         [('generate_binary_tree', 4), ('generate_binary_tree', 8), ('get_stats', 4), ('get_stats', 8)])
+        for result in report['results']:
+            self.assertGreater(result['seconds'], 0)
+            self.assertGreater(result['peak_bytes'], 0)
+        with self.assertRaises(Exception):
+            run_benchmarks(['generate_eller'], sizes=[4])
+
+    def test_compare(self):
+        baseline = {'results': [{'case': 'a', 'size': 10, 'seconds': 1.0, 'peak_bytes': 1000},
+                                {'case': 'b', 'size': 10, 'seconds': 0.0001, 'peak_bytes': None}]}
+        report = {'results': [{'case': 'a', 'size': 10, 'seconds': 1.1, 'peak_bytes': 2000},
+                              {'case': 'b', 'size': 10, 'seconds': 0.0005, 'peak_bytes': 100},
+                              {'case': 'c', 'size': 10, 'seconds': 5.0, 'peak_bytes': 100}]}
+        regressions = compare_reports(report, baseline, tolerance=0.2)
+        # Too noisy below a millisecond, and there is nothing to compare new cases against
+        self.assertEqual([(r['case'], r['metric']) for r in regressions], [('a', 'peak_bytes')])
+        self.assertEqual(regressions[0]['ratio'], 2.0)
+        self.assertEqual(compare_reports(report, baseline, tolerance=0.05)[0]['metric'], 'seconds')
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'baseline.json')
+            args = ['--cases', 'generate_side_winder', '--sizes', '6', '--repeat', '1', '--no-memory']
+            self.assertEqual(main(args + ['--output', output]), 0)
+            with open(output) as f:
+                report = json.load(f)
+            self.assertEqual(report['seed'], 0)
+            self.assertIsNone(report['results'][0]['peak_bytes'])
+            self.assertEqual(main(args + ['--compare', output, '--tolerance', '1000']), 0)
+
+    def test_instrument_case(self):
+        report = instrument_case('generate_hunt_and_kill', 5)
+        self.assertEqual(report['counters']['cells_linked'], 24)
+        self.assertEqual(report['phase_calls'], {'generation': 1})
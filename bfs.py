@@ -0,0 +1,141 @@
+import numpy as np
+from typing import Iterable, List, Optional, Tuple
+from maze_fun.array_grid import NORTH, SOUTH, EAST, WEST
+
+
+class BFSEngine(object):
+    """ Breadth first search over a passage bitmask (see array_grid) using flat cell indices.
+    The default search is a plain loop over one flat queue, so its cost only grows with the number of cells it
+    visits. The level by level vectorized search (see search_levels) runs a handful of numpy calls per BFS level,
+    which only pays off on open grids whose frontiers are wide and whose distances are short. On a maze with long
+    corridors it is the diameter rather than the size that sets its cost.
+    """
+    def __init__(self, passages: np.ndarray):
+        self.rows, self.cols = passages.shape
+        self.flat_passages = passages.ravel()
+        self.offsets = ((NORTH, -self.cols), (SOUTH, self.cols), (EAST, 1), (WEST, -1))
+        self.nodes_expanded = 0
+        self.passage_list = None  # type: Optional[List[int]]
+
+    def flat_index(self, node: Tuple[int, int]) -> int:
+        return node[0] * self.cols + node[1]
+
+    def get_passage_list(self) -> List[int]:
+        """ The passages as Python ints, indexing a list is several times faster than indexing an array """
+        if self.passage_list is None:
+            self.passage_list = self.flat_passages.tolist()
+        return self.passage_list
+
+    def search(self, starting_nodes: Iterable[Tuple[int, int]], target: Optional[Tuple[int, int]]=None,
+               max_radius: Optional[int]=None, with_parents: bool=False,
+               vectorized: bool=False) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        :param starting_nodes: One or more (row, col) nodes that all start at distance 0
+        :param target: Stop as soon as this node has been reached
+        :param max_radius: Do not visit nodes further away than this
+        :param with_parents: Also return the flat index each node was reached from, -1 for the starting nodes and
+        -2 for the nodes that were not reached
+        :param vectorized: Use search_levels, for wide and shallow searches
+        :return: (distances, parents) as (rows, cols) arrays. Unreached nodes have distance -1.
+        """
+        if vectorized:
+            return self.search_levels(starting_nodes, target, max_radius, with_parents)
+        size = self.rows * self.cols
+        passages = self.get_passage_list()
+        distances = [-1] * size
+        parents = [-2] * size if with_parents else None
+        queue = sorted({self.flat_index(node) for node in starting_nodes})
+        for index in queue:
+            distances[index] = 0
+            if with_parents:
+                parents[index] = -1
+        target_index = self.flat_index(target) if target is not None else -1
+        radius = max_radius if max_radius is not None else size
+        # The flat offsets of the linked neighbors for every passage bitmask
+        neighbor_offsets = [tuple(offset for direction, offset in self.offsets if mask & direction)
+                            for mask in range(16)]
+        expanded = 0
+        if target_index not in queue:
+            # Iterating a list that is being appended to also visits the new items
+            for current in queue:
+                distance = distances[current] + 1
+                if distance > radius:
+                    break
+                expanded += 1
+                for offset in neighbor_offsets[passages[current] & 15]:
+                    neighbor = current + offset
+                    if distances[neighbor] < 0:
+                        distances[neighbor] = distance
+                        if with_parents:
+                            parents[neighbor] = current
+                        queue.append(neighbor)
+                if target_index >= 0 and distances[target_index] >= 0:
+                    break
+        self.nodes_expanded += expanded
+
+        distances = np.array(distances, dtype=np.int32).reshape(self.rows, self.cols)
+        if with_parents:
+            parents = np.array(parents, dtype=np.int64).reshape(self.rows, self.cols)
+        return distances, parents
+
+    def search_levels(self, starting_nodes: Iterable[Tuple[int, int]], target: Optional[Tuple[int, int]]=None,
+                      max_radius: Optional[int]=None,
+                      with_parents: bool=False) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """ Same as search, but every level of the search is expanded with a few array operations over a
+        preallocated queue. See search for the parameters.
+        """
+        size = self.rows * self.cols
+        distances = np.full(size, -1, dtype=np.int32)
+        parents = np.full(size, -2, dtype=np.int64) if with_parents else None
+        queue = np.empty(size, dtype=np.int64)
+
+        starts = np.unique(np.array([self.flat_index(node) for node in starting_nodes], dtype=np.int64))
+        queue[:len(starts)] = starts
+        distances[starts] = 0
+        if with_parents:
+            parents[starts] = -1
+        head, tail = 0, len(starts)
+        target_index = self.flat_index(target) if target is not None else None
+        level = 0
+        while head < tail:
+            if max_radius is not None and level >= max_radius:
+                break
+            if target_index is not None and distances[target_index] >= 0:
+                break
+            frontier = queue[head:tail]
+            head = tail
+            level += 1
+            self.nodes_expanded += len(frontier)
+            frontier_passages = self.flat_passages[frontier]
+            for direction, offset in self.offsets:
+                sources = frontier[(frontier_passages & direction) != 0]
+                if not len(sources):
+                    continue
+                neighbors = sources + offset
+                unvisited = distances[neighbors] < 0
+                neighbors = neighbors[unvisited]
+                distances[neighbors] = level
+                if with_parents:
+                    parents[neighbors] = sources[unvisited]
+                queue[tail:tail + len(neighbors)] = neighbors
+                tail += len(neighbors)
+
+        distances = distances.reshape(self.rows, self.cols)
+        if with_parents:
+            parents = parents.reshape(self.rows, self.cols)
+        return distances, parents
+
+    def path_to(self, parents: np.ndarray, target: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """ Follows the parents returned by search back from the target
+        :return: The nodes from the starting node to the target
+        """
+        flat_parents = parents.ravel()
+        current = self.flat_index(target)
+        if flat_parents[current] == -2:
+            raise Exception('{0} was not reached by the search'.format(target))
+        path = [current]
+        while flat_parents[current] >= 0:
+            current = int(flat_parents[current])
+            path.append(current)
+        path.reverse()
+        return [divmod(index, self.cols) for index in path]
@@ -1,11 +1,13 @@
-from PIL import Image
-from random import choice
+import numpy as np
+from typing import Iterator, Optional, Tuple
 from maze_fun.maze import MazeGrid
+from maze_fun.array_grid import passages_from_south_east, random_bits
 
 
 class BinaryTree(MazeGrid):
-    def apply_algorithm(self) -> Image:
-        frames = [self.create_maze_image()]
+    respects_disabled_cells = False
+
+    def generate_steps(self):
         for row in self.each_row():
             for col in self.each_col():
                 cell = self[row, col]
@@ -17,17 +19,54 @@ class BinaryTree(MazeGrid):
 
                 # Don't run the random function if there's only one for unit testing pursoes
                 if len(neighbors) == 1:
-                    cell.link_two_cells(neighbors[0])
+                    self.link_cells(cell, neighbors[0])
                 elif len(neighbors) == 0:
                     continue
                 else:
-                    n = choice(neighbors)
-                    cell.link_two_cells(n)
-                frames.append(self.create_maze_image())
-        return frames
+                    n = self.rng.choice(neighbors)
+                    self.link_cells(cell, n)
+                yield
+
+    def apply_vectorized_algorithm(self, seed=None):
+        """ Carves the whole maze with a handful of array operations instead of one link per cell.
+        Every cell's north/east decision is independent, so all of the coin flips are drawn at once.
+        :param seed: int seed or numpy Generator for the coin flips
+        """
+        self.load_passage_array(self.generate_passages(self.rows, self.cols, np.random.default_rng(seed)))
+
+    @staticmethod
+    def stream_rows(cols: int, rows: Optional[int]=None, seed=None) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """ Generates the maze one row at a time in O(cols) memory, see MazeFileWriter for writing them out.
+        :param rows: Number of rows, None keeps generating rows for as long as they are consumed
+        :param seed: int seed or numpy Generator
+        :return: Iterator of (east, north) bool arrays, marking the cells linked to their right and upper neighbor
+        """
+        rng = np.random.default_rng(seed)
+        row = 0
+        while rows is None or row < rows:
+            if row == 0:
+                go_north = np.zeros(cols, dtype=bool)
+            else:
+                go_north = random_bits(rng, 1, cols)[0]
+                go_north[-1] = True
+            go_east = ~go_north
+            go_east[-1] = False
+            yield go_east, go_north
+            row += 1
+
+    @staticmethod
+    def generate_passages(rows: int, cols: int, rng: np.random.Generator) -> np.ndarray:
+        go_north = np.zeros((rows, cols), dtype=bool)
+        # Same draws as stream_rows. The north row can only go east and the east column can only go north
+        go_north[1:] = random_bits(rng, rows - 1, cols)
+        go_north[1:, -1] = True
+        go_east = ~go_north
+        go_east[:, -1] = False
+        south = np.zeros((rows, cols), dtype=bool)
+        south[:-1] = go_north[1:]
+        return passages_from_south_east(south, go_east)
 
 
 if __name__ == '__main__':
     grid = BinaryTree(10, 10)
-    frames = grid.create_maze_path_frames()
-    MazeGrid.create_gif_from_frames(frames, 'output.gif')
+    grid.create_maze_path_frames('output.gif')
@@ -0,0 +1,63 @@
+from PIL import Image, ImageDraw
+from typing import List, Tuple
+from maze_fun.cell import Cell
+
+Segment = Tuple[int, int, int, int]
+
+
+class CanvasRenderer(object):
+    """ Keeps one maze image around and updates it as cells get linked, so an animation frame costs a constant
+    amount of drawing plus a copy instead of a full redraw of every wall.
+    The canvas is built from the maze at construction time and is only kept up to date through on_link, so
+    enabling or disabling cells afterwards needs a new renderer.
+    """
+    def __init__(self, maze):
+        self.maze = maze
+        self.cell_size = maze.default_cell_size
+        self.wall_width = maze.maze_wall_width
+        self.canvas = maze.create_maze_image(place_on_background=False)
+        self.drawer = ImageDraw.Draw(self.canvas)
+
+    def on_link(self, cell: Cell, other: Cell):
+        """ Erases the wall between two cells that were just linked """
+        segment = self.get_shared_segment(cell, other)
+        self.draw_segment(segment, self.maze.fill_white)
+        # The erased line also cleared the ends of the walls that meet it, so redraw those
+        x1, y1, x2, y2 = segment
+        for touching_segment in self.get_touching_segments(x1, y1) + self.get_touching_segments(x2, y2):
+            if touching_segment != segment and self.is_wall(touching_segment):
+                self.draw_segment(touching_segment, self.maze.fill_black)
+
+    def get_frame(self, place_on_background: bool=True) -> Image:
+        if place_on_background:
+            return self.maze.place_maze_on_background(self.canvas, self.maze.get_base_image_size())
+        return self.canvas.copy()
+
+    def draw_segment(self, segment: Segment, fill: Tuple[int, int, int]):
+        coords = [coord * self.cell_size for coord in segment]
+        self.drawer.line(coords, width=self.wall_width, fill=fill)
+
+    @staticmethod
+    def get_shared_segment(cell: Cell, other: Cell) -> Segment:
+        first, second = sorted([cell.pos, other.pos])
+        row, col = second
+        if first[0] == row:
+            return col, row, col, row + 1
+        return col, row, col + 1, row
+
+    @staticmethod
+    def get_touching_segments(x: int, y: int) -> List[Segment]:
+        return [(x - 1, y, x, y), (x, y, x + 1, y), (x, y - 1, x, y), (x, y, x, y + 1)]
+
+    def is_wall(self, segment: Segment) -> bool:
+        """ Mirrors create_maze_image: a segment is drawn when it borders an enabled cell and isn't a link """
+        x1, y1, x2, y2 = segment
+        if y1 == y2:
+            cells = [self.maze[y1 - 1, x1], self.maze[y1, x1]]
+        else:
+            cells = [self.maze[y1, x1 - 1], self.maze[y1, x1]]
+        if not any(cell and cell.enabled for cell in cells):
+            return False
+        if cells[0] and cells[1]:
+            return not cells[0].is_linked(cells[1])
+        return True
@@ -2,7 +2,21 @@ import random
 from typing import Tuple, List, Optional
 
 
+class StructureVersion(object):
+    """ A counter shared by all cells of a maze that is bumped whenever a link or the enabled state of one of them
+    changes, so anything derived from the structure of the maze can tell whether it is stale.
+    """
+    def __init__(self):
+        self.value = 0
+
+    def bump(self):
+        self.value += 1
+
+
 class Cell(object):
+    # Set by the maze that owns the cell
+    structure_version = None  # type: Optional[StructureVersion]
+
     def __init__(self, row_num: int, col_num: int):
         self.row_num = row_num
         self.col_num = col_num
@@ -10,21 +24,29 @@ class Cell(object):
         self.north, self.south, self.left, self.right = None, None, None, None
         self.enabled = True
 
+    def bump_structure_version(self):
+        if self.structure_version is not None:
+            self.structure_version.bump()
+
     def disable_cell(self):
         self.enabled = False
+        self.bump_structure_version()
 
     def enable_cell(self):
         self.enabled = True
+        self.bump_structure_version()
 
     def link_two_cells(self, other: 'Cell', bidirection=True):
         self.links[other] = True
         if bidirection:
             other.link_two_cells(self, False)
+            self.bump_structure_version()
 
     def unlink_two_cells(self, other: 'Cell', bidirection=True):
         del self.links[other]
         if bidirection:
             other.unlink_two_cells(self, False)
+            self.bump_structure_version()
 
     def get_links(self):
         return self.links.keys()
@@ -42,9 +64,13 @@ class Cell(object):
                 neighbors.append(n)
         return neighbors
 
-    def get_random_neighbor(self) -> 'Cell':
+    def get_random_neighbor(self, rng=random) -> 'Cell':
+        """ :param rng: The random module or a random.Random, see MazeGrid.rng """
         neighbors = self.get_neighbors()
-        return random.sample(neighbors, 1)[0]
+        return rng.sample(neighbors, 1)[0]
+
+    def get_random_enabled_neighbor(self, rng=random) -> 'Cell':
+        return rng.choice([n for n in self.get_neighbors() if n.enabled])
 
     def get_unlinked_neighbors(self) -> List['Cell']:
         """ Will get enabled unlinked neighbors
@@ -57,11 +83,11 @@ class Cell(object):
                 unlinked_neighbors.append(n)
         return unlinked_neighbors
 
-    def get_random_unlinked_neighbor(self) -> Optional['Cell']:
+    def get_random_unlinked_neighbor(self, rng=random) -> Optional['Cell']:
         unlinked_neighbors = self.get_unlinked_neighbors()
         if not unlinked_neighbors:
             return None
-        return random.sample(unlinked_neighbors, 1)[0]
+        return rng.sample(unlinked_neighbors, 1)[0]
 
     def __eq__(self, other: 'Cell'):
         return self.row_num == other.row_num and self.col_num == other.col_num
@@ -0,0 +1,42 @@
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+
+class DistanceCache(object):
+    """ Least recently used cache of BFS distance arrays keyed by (source, structure version).
+    A change to the maze bumps its version, so entries of an older maze are never hit again and simply age out.
+    """
+    def __init__(self, max_size: int=16):
+        self.max_size = max_size
+        self.entries = OrderedDict()  # type: OrderedDict[Tuple[Tuple[int, int], int], np.ndarray]
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, source: Tuple[int, int], version: int) -> Optional[np.ndarray]:
+        key = (source, version)
+        distances = self.entries.get(key)
+        if distances is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return distances
+
+    def peek(self, source: Tuple[int, int], version: int) -> Optional[np.ndarray]:
+        """ Same as get, but without counting a hit or miss or refreshing the entry """
+        return self.entries.get((source, version))
+
+    def put(self, source: Tuple[int, int], version: int, distances: np.ndarray):
+        # Callers share the cached array, so it must not be changed in place
+        distances.flags.writeable = False
+        self.entries[(source, version)] = distances
+        self.entries.move_to_end((source, version))
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.entries)}
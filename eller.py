@@ -0,0 +1,98 @@
+import numpy as np
+from typing import Iterator, Optional, Tuple
+from maze_fun.maze import MazeGrid
+from maze_fun.array_grid import random_bits
+
+
+class Eller(MazeGrid):
+    """ Eller's algorithm carves a perfect maze one row at a time. Every cell of the current row carries the
+    label of the set of cells it is already connected to. Adjacent cells of different sets are joined at random,
+    then every set carves down at least once so none of them is cut off from the rows below. The last row joins
+    whatever sets are left.
+    """
+    respects_disabled_cells = False
+
+    def generate_steps(self):
+        for row, (east, north) in enumerate(self.stream_rows(self.cols, self.rows, self.rng.getrandbits(64))):
+            for col in np.flatnonzero(north).tolist():
+                self.link_cells(self[row, col], self[row - 1, col])
+                yield
+            for col in np.flatnonzero(east).tolist():
+                self.link_cells(self[row, col], self[row, col + 1])
+                yield
+
+    def apply_vectorized_algorithm(self, seed=None):
+        """
+        :param seed: int seed or numpy Generator
+        """
+        self.load_passage_rows(self.stream_rows(self.cols, self.rows, seed))
+
+    @classmethod
+    def stream_rows(cls, cols: int, rows: Optional[int]=None, seed=None) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """ Generates the maze one row at a time in O(cols) memory, see MazeFileWriter for writing them out.
+        :param rows: Number of rows, None keeps generating rows for as long as they are consumed. Such a maze
+        never gets a last row, so the rows consumed so far are only a perfect maze once the sets are closed off.
+        :param seed: int seed or numpy Generator
+        :return: Iterator of (east, north) bool arrays, marking the cells linked to their right and upper neighbor
+        """
+        rng = np.random.default_rng(seed)
+        sets = np.arange(cols, dtype=np.int64)
+        north = np.zeros(cols, dtype=bool)
+        row = 0
+        while rows is None or row < rows:
+            last_row = rows is not None and row == rows - 1
+            east, sets = cls.join_row(sets, rng, last_row)
+            yield east, north
+            if not last_row:
+                north, sets = cls.carve_down(sets, rng)
+            row += 1
+
+    @staticmethod
+    def join_row(sets: np.ndarray, rng: np.random.Generator, join_all: bool) -> Tuple[np.ndarray, np.ndarray]:
+        """ Links adjacent cells of different sets, each with a coin flip or all of them on the last row.
+        Two cells of the same set are never linked as they are already connected through the rows above.
+        :return: (east, sets) with the labels of merged sets replaced by a single label
+        """
+        cols = len(sets)
+        east = np.zeros(cols, dtype=bool)
+        candidates = sets[:-1] != sets[1:]
+        if not join_all:
+            candidates &= random_bits(rng, 1, cols)[0][:-1]
+        parent = {}
+
+        def find(label: int) -> int:
+            root = label
+            while parent.get(root, root) != root:
+                root = parent[root]
+            while label != root:
+                parent[label], label = root, parent[label]
+            return root
+
+        labels = sets.tolist()
+        for col in np.flatnonzero(candidates).tolist():
+            left, right = find(labels[col]), find(labels[col + 1])
+            if left != right:
+                parent[right] = left
+                east[col] = True
+        return east, np.array([find(label) for label in labels], dtype=np.int64)
+
+    @staticmethod
+    def carve_down(sets: np.ndarray, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+        """ Picks the cells that link to the row below. Besides a coin flip per cell, one random member of every
+        set always carves down. Cells below a link keep the set of the cell above, the others start a new set.
+        :return: (north, sets) for the next row, with set labels compacted to 0..cols-1
+        """
+        cols = len(sets)
+        down = random_bits(rng, 1, cols)[0]
+        # The first occurrence of every label in a random order of the columns is a random member of that set
+        order = rng.permutation(cols)
+        _, first = np.unique(sets[order], return_index=True)
+        down[order[first]] = True
+        next_sets = np.where(down, sets, cols + np.arange(cols))
+        _, next_sets = np.unique(next_sets, return_inverse=True)
+        return down, next_sets.astype(np.int64)
+
+
+if __name__ == '__main__':
+    grid = Eller(10, 10)
+    grid.create_maze_path_frames('output.gif')
@@ -0,0 +1,75 @@
+import numpy as np
+from typing import Iterator, Tuple
+
+
+class EnabledCellIndex(object):
+    """ Keeps the enabled positions of a grid in a dense array plus a reverse map from position to slot.
+    Cells are removed by swapping the last enabled position into their slot, so adding, removing, counting and
+    random access are all O(1) and iterating only touches enabled cells.
+    """
+    def __init__(self, rows: int, cols: int):
+        self.rows = rows
+        self.cols = cols
+        size = rows * cols
+        # Flat indices (row * cols + col) of the enabled cells live in positions[0:count]
+        self.positions = np.arange(size, dtype=np.int64)
+        # slots[flat_index] is the index into positions, or -1 when the cell is disabled
+        self.slots = np.arange(size, dtype=np.int64)
+        self.count = size
+
+    def copy(self) -> 'EnabledCellIndex':
+        other = EnabledCellIndex.__new__(EnabledCellIndex)
+        other.rows, other.cols, other.count = self.rows, self.cols, self.count
+        other.positions = self.positions.copy()
+        other.slots = self.slots.copy()
+        return other
+
+    def set_mask(self, mask: np.ndarray):
+        """ Replaces the enabled cells with the True cells of a (rows, cols) bool mask in one step """
+        enabled = np.flatnonzero(mask)
+        self.count = len(enabled)
+        self.positions[:self.count] = enabled
+        self.positions[self.count:] = np.flatnonzero(~np.asarray(mask, dtype=bool).ravel())
+        self.slots.fill(-1)
+        self.slots[enabled] = np.arange(self.count)
+
+    def flat_index(self, row: int, col: int) -> int:
+        return row * self.cols + col
+
+    def add(self, row: int, col: int):
+        flat_index = self.flat_index(row, col)
+        if self.slots[flat_index] >= 0:
+            return
+        self.positions[self.count] = flat_index
+        self.slots[flat_index] = self.count
+        self.count += 1
+
+    def remove(self, row: int, col: int):
+        flat_index = self.flat_index(row, col)
+        slot = self.slots[flat_index]
+        if slot < 0:
+            return
+        self.count -= 1
+        last = self.positions[self.count]
+        self.positions[slot] = last
+        self.slots[last] = slot
+        self.slots[flat_index] = -1
+
+    def __contains__(self, pos: Tuple[int, int]) -> bool:
+        return self.slots[self.flat_index(*pos)] >= 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, i: int) -> Tuple[int, int]:
+        if i < 0 or i >= self.count:
+            raise IndexError(i)
+        row, col = divmod(int(self.positions[i]), self.cols)
+        return row, col
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        for flat_index in self.positions[:self.count].tolist():
+            yield divmod(flat_index, self.cols)
+
+    def flat_indices(self) -> np.ndarray:
+        return self.positions[:self.count]
@@ -0,0 +1,97 @@
+import numpy as np
+from typing import Callable, Iterator, List, Optional, Sequence, Union
+from maze_fun.frame_sinks import HoldFrame
+from PIL import Image
+
+
+class FrameScheduler(object):
+    """ Fits an animation into a fixed number of frames, given directly or as a duration at some fps.
+    Only the steps picked by get_render_steps are rendered, so the rendering cost grows with the number of frames
+    rather than with the number of carving steps, and the length of the output no longer depends on the grid size.
+    """
+    default_fps = 15
+
+    def __init__(self, frames: int=None, duration: float=None, fps: int=default_fps):
+        """
+        :param frames: Total number of frames
+        :param duration: Length in seconds, used when frames is not given
+        """
+        self.fps = fps
+        self.frame_count = self.get_frame_count(frames, duration, fps)
+        if self.frame_count is None:
+            raise Exception('A frame count or a duration is needed to schedule frames')
+
+    @staticmethod
+    def get_frame_count(frames: Optional[int], duration: Optional[float], fps: int) -> Optional[int]:
+        """
+        :return: None when neither a frame count nor a duration is given
+        """
+        if frames is not None:
+            return max(int(frames), 1)
+        if duration is not None:
+            return max(int(round(duration * fps)), 1)
+        return None
+
+    @property
+    def duration(self) -> float:
+        return self.frame_count / self.fps
+
+    def split(self, weights: Sequence[float]) -> List[int]:
+        """ Divides the frames between the parts of an animation in proportion to their weights
+        :return: One frame count per weight, summing to frame_count
+        """
+        shares = np.asarray(weights, dtype=float) / sum(weights) * self.frame_count
+        counts = np.floor(shares).astype(int)
+        # Hand the frames lost to rounding down to the largest remainders
+        for index in np.argsort(counts - shares, kind='stable')[:self.frame_count - counts.sum()]:
+            counts[index] += 1
+        return counts.tolist()
+
+    @staticmethod
+    def get_render_steps(step_count: int, frame_count: int) -> List[int]:
+        """ Spreads frames evenly over the steps. The first frame shows the state before any step and the last one
+        the state after all of them, the others are rendered after the returned step numbers. A step number shows
+        up more than once when there are more frames than steps.
+        """
+        if frame_count < 3:
+            return []
+        return np.ceil(np.linspace(0, step_count, frame_count)[1:-1]).astype(int).tolist()
+
+    @staticmethod
+    def iterate(steps: Iterator, step_count: int, frame_count: int,
+                render: Callable[[], Image.Image]) -> Iterator[Union[Image.Image, HoldFrame]]:
+        """ Runs every step and yields exactly frame_count frames. Frames scheduled for a step that was already
+        rendered come out as a HoldFrame, so sinks repeat what they encoded rather than getting the same image again.
+        :param steps: Iterator that changes what render draws, one item per step
+        :param step_count: Expected number of steps. If the steps run out early the frames left are held on the
+        final frame, if there are more the frames are just spread over the first step_count.
+        """
+        if frame_count < 1:
+            for _ in steps:
+                pass
+            return
+        render_steps = FrameScheduler.get_render_steps(step_count, frame_count)
+        rendered_step = None
+        if frame_count > 1:
+            yield render()
+            rendered_step = 0
+        step = 0
+        next_frame = 0
+        for _ in steps:
+            step += 1
+            due = next_frame
+            while next_frame < len(render_steps) and render_steps[next_frame] <= step:
+                next_frame += 1
+            if next_frame > due:
+                yield render()
+                rendered_step = step
+                if next_frame - due > 1:
+                    yield HoldFrame(next_frame - due - 1)
+        held = len(render_steps) - next_frame
+        # The final frame, unless nothing changed since the last one
+        if rendered_step == step:
+            held += 1
+        else:
+            yield render()
+        if held:
+            yield HoldFrame(held)
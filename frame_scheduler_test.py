@@ -0,0 +1,85 @@
+import os
+import random
+import tempfile
+import cv2
+from piyush_utils.base_test_case import BaseTestCase
+from maze_fun.frame_scheduler import FrameScheduler
+from maze_fun.frame_sinks import GifSink, HoldFrame
+from maze_fun.recursive_backtracker import RecursiveBackTracker
+from maze_fun.side_winder import SideWinder
+from PIL import Image
+
+
+class FrameSchedulerTest(BaseTestCase):
+    def test_frame_count(self):
+        self.assertEqual(FrameScheduler(frames=40).frame_count, 40)
+        self.assertEqual(FrameScheduler(duration=2.5, fps=30).frame_count, 75)
+        self.assertEqual(FrameScheduler(duration=2.5, fps=30).duration, 2.5)
+        self.assertIsNone(FrameScheduler.get_frame_count(None, None, 15))
+        with self.assertRaises(Exception):
+            FrameScheduler()
+        self.assertEqual(FrameScheduler(frames=11).split((6, 3, 1)), [7, 3, 1])
+        self.assertEqual(sum(FrameScheduler(frames=1001).split((6, 3, 1))), 1001)
+
+    def test_iterate(self):
+        renders = []
+
+        def render():
+            renders.append(steps_taken[0])
+            return Image.new('RGB', (1, 1))
+
+        def steps(count):
+            for _ in range(count):
+                steps_taken[0] += 1
+                yield
+
+        for step_count, frame_count, actual_steps in [(100, 10, 100), (5, 12, 5), (50, 10, 20), (50, 2, 50),
+                                                      (50, 1, 50), (0, 5, 0)]:
+            steps_taken, renders = [0], []
+            frames = list(FrameScheduler.iterate(steps(actual_steps), step_count, frame_count, render))
+            self.assertEqual(sum(f.count if isinstance(f, HoldFrame) else 1 for f in frames), frame_count)
+            self.assertEqual(steps_taken[0], actual_steps)
+            # Never more renders than steps plus the starting frame, and the last render is the finished state
+            self.assertLessEqual(len(renders), min(frame_count, actual_steps + 1))
+            self.assertEqual(renders[-1], actual_steps)
+            self.assertNotIsInstance(frames[0], HoldFrame)
+        self.assertEqual(FrameScheduler.get_render_steps(100, 11), list(range(10, 100, 10)))
+
+    def test_budgeted_animation(self):
+        random.seed(1)
+        maze = SideWinder(6, 6)
+        frames = list(maze.iterate_frames(frames=8))
+        self.assertEqual(len(frames), 8)
+        self.assertEqual(frames[-1].tobytes(), maze.create_maze_image().tobytes())
+        # Held frames are repeated in the list apply_algorithm returns
+        maze = RecursiveBackTracker(3, 3)
+        frames = maze.apply_algorithm()
+        self.assertEqual(len(frames), maze.animation_frames)
+        self.assertEqual(frames[-1].tobytes(), maze.create_maze_image().tobytes())
+
+        with tempfile.TemporaryDirectory() as directory:
+            for size in [4, 9]:
+                png_directory = os.path.join(directory, str(size))
+                RecursiveBackTracker(size, size).create_maze_path_frames(png_directory, frames=30)
+                self.assertEqual(len(os.listdir(png_directory)), 30)
+
+            video_path = os.path.join(directory, 'maze.mp4')
+            sink = RecursiveBackTracker(5, 5).apply_algorithm(video_path, duration=2, fps=10)
+            self.assertEqual(sink.get_stats()['frames_encoded'], 20)
+            video = cv2.VideoCapture(video_path)
+            self.assertEqual(int(video.get(cv2.CAP_PROP_FRAME_COUNT)), 20)
+            video.release()
+
+    def test_hold_frames(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, 'maze.gif')
+            black, white = Image.new('RGB', (4, 4)), Image.new('RGB', (4, 4), (255, 255, 255))
+            self.assertEqual(GifSink(file_path).consume([black, HoldFrame(2), white, HoldFrame(1)]), 5)
+            gif = Image.open(file_path)
+            self.assertEqual(gif.n_frames, 5)
+            gif.seek(2)
+            self.assertEqual(gif.convert('RGB').getpixel((0, 0)), (0, 0, 0))
+            gif.seek(4)
+            self.assertEqual(gif.convert('RGB').getpixel((0, 0)), (255, 255, 255))
+            with self.assertRaises(Exception):
+                GifSink(file_path).consume([HoldFrame(1)])
@@ -0,0 +1,247 @@
+import os
+import time
+import queue
+import shutil
+import threading
+import cv2
+import numpy as np
+from PIL import Image, GifImagePlugin
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+
+class HoldFrame(object):
+    """ Stands for count repeats of the previous frame in a stream of frames. Sinks write out what they already
+    encoded for that frame instead of converting the same image again.
+    """
+    def __init__(self, count: int):
+        self.count = count
+
+
+class FrameSink(object):
+    """ Writes animation frames to some output one at a time, so frames can be consumed straight from a lazy
+    iterator such as MazeGrid.iterate_frames without ever holding more than the current frame.
+    """
+    def write(self, frame: Image.Image):
+        raise NotImplementedError
+
+    def hold(self, count: int):
+        """ Repeats the last written frame count times """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def consume(self, frames: Iterable[Union[Image.Image, HoldFrame]]) -> int:
+        """ Writes every frame and closes the sink.
+        :return: The number of frames written, held frames included
+        """
+        count = 0
+        try:
+            for frame in frames:
+                if isinstance(frame, HoldFrame):
+                    self.hold(frame.count)
+                    count += frame.count
+                    continue
+                self.write(frame)
+                count += 1
+        finally:
+            self.close()
+        return count
+
+
+class GifSink(FrameSink):
+    """ Streams a looping GIF to disk. Every frame gets its own color table, so nothing but the file handle has
+    to be kept between frames.
+    """
+    def __init__(self, output_file_path: str, duration: int=100, loop: int=0):
+        self.output_file_path = output_file_path
+        self.duration = duration
+        self.loop = loop
+        self.fp = None
+        # Encoded chunks of the last frame, written again for held frames
+        self.last_frame = None  # type: Optional[List[bytes]]
+
+    def write(self, frame: Image.Image):
+        palette_frame = frame.convert('RGB').convert('P', palette=Image.ADAPTIVE)
+        if self.fp is None:
+            self.fp = open(self.output_file_path, 'wb')
+            header, _ = GifImagePlugin.getheader(palette_frame, info={'loop': self.loop, 'duration': self.duration})
+            for chunk in header:
+                self.fp.write(chunk)
+        self.last_frame = list(GifImagePlugin.getdata(palette_frame, duration=self.duration,
+                                                      include_color_table=True))
+        for chunk in self.last_frame:
+            self.fp.write(chunk)
+
+    def hold(self, count: int):
+        if self.last_frame is None:
+            raise Exception('There is no frame to hold')
+        for _ in range(count):
+            for chunk in self.last_frame:
+                self.fp.write(chunk)
+
+    def close(self):
+        if self.fp is not None:
+            self.fp.write(b';')
+            self.fp.close()
+            self.fp = None
+
+
+class VideoSink(FrameSink):
+    """ Writes frames to an mp4 file, the video is sized after the first frame """
+    def __init__(self, output_file_path: str, fps: int=15):
+        self.output_file_path = output_file_path
+        self.fps = fps
+        self.writer = None  # type: cv2.VideoWriter
+        self.last_frame = None  # type: Optional[np.ndarray]
+
+    @staticmethod
+    def create_writer(video_dims: Tuple[int, int], output_file_path: str, fps: int=15) -> cv2.VideoWriter:
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        return cv2.VideoWriter(output_file_path, fourcc, fps, video_dims)
+
+    @staticmethod
+    def convert_frame(frame: Image.Image) -> np.ndarray:
+        frame_as_np = np.array(frame)
+        return cv2.cvtColor(frame_as_np, cv2.COLOR_RGB2BGR)
+
+    @staticmethod
+    def write_to_writer(writer: cv2.VideoWriter, frame: Image.Image):
+        writer.write(VideoSink.convert_frame(frame))
+
+    def write(self, frame: Image.Image):
+        if self.writer is None:
+            self.writer = self.create_writer(frame.size, self.output_file_path, self.fps)
+        self.last_frame = self.convert_frame(frame)
+        self.writer.write(self.last_frame)
+
+    def hold(self, count: int):
+        if self.last_frame is None:
+            raise Exception('There is no frame to hold')
+        for _ in range(count):
+            self.writer.write(self.last_frame)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.release()
+            self.writer = None
+
+
+class PngSequenceSink(FrameSink):
+    """ Saves every frame as <directory>/<prefix>_00000.png, <prefix>_00001.png, ... """
+    def __init__(self, directory: str, prefix: str='frame'):
+        self.directory = directory
+        self.prefix = prefix
+        self.frame_num = 0
+        self.last_path = None  # type: Optional[str]
+
+    def get_path(self) -> str:
+        return os.path.join(self.directory, '{0}_{1:05d}.png'.format(self.prefix, self.frame_num))
+
+    def write(self, frame: Image.Image):
+        os.makedirs(self.directory, exist_ok=True)
+        self.last_path = self.get_path()
+        frame.save(self.last_path)
+        self.frame_num += 1
+
+    def hold(self, count: int):
+        if self.last_path is None:
+            raise Exception('There is no frame to hold')
+        for _ in range(count):
+            shutil.copyfile(self.last_path, self.get_path())
+            self.frame_num += 1
+
+
+class BackgroundSink(FrameSink):
+    """ Hands frames to another sink running on a dedicated encoder thread, so carving and rasterizing the next
+    frames overlaps with the color conversion and encoding of the previous ones (most of which releases the GIL).
+    The queue is bounded: write blocks once max_queue_size frames are waiting, which keeps memory in check when
+    the encoder is the slower side. get_stats tells which side is the bottleneck.
+    """
+    def __init__(self, sink: FrameSink, max_queue_size: int=8):
+        self.sink = sink
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self.error = None  # type: Optional[Exception]
+        self.closed = False
+        self.frames_encoded = 0
+        self.encode_time = 0.0
+        self.encoder_idle_time = 0.0
+        self.producer_wait_time = 0.0
+        self.max_queue_depth = 0
+        self.thread = threading.Thread(target=self.run, name='frame-encoder', daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while True:
+            start = time.perf_counter()
+            frame = self.queue.get()
+            self.encoder_idle_time += time.perf_counter() - start
+            if frame is None:
+                break
+            if self.error is not None:
+                # Keep draining so the producer never blocks on a dead encoder
+                continue
+            start = time.perf_counter()
+            try:
+                if isinstance(frame, HoldFrame):
+                    self.sink.hold(frame.count)
+                    self.frames_encoded += frame.count
+                else:
+                    self.sink.write(frame)
+                    self.frames_encoded += 1
+            except Exception as e:
+                self.error = e
+            self.encode_time += time.perf_counter() - start
+
+    def write(self, frame: Image.Image):
+        if self.error is not None:
+            raise self.error
+        start = time.perf_counter()
+        self.queue.put(frame)
+        self.producer_wait_time += time.perf_counter() - start
+        self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+
+    def hold(self, count: int):
+        self.write(HoldFrame(count))
+
+    def close(self):
+        """ Waits for every queued frame to be encoded, then closes the wrapped sink """
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(None)
+        self.thread.join()
+        self.sink.close()
+        if self.error is not None:
+            raise self.error
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        :return: A high producer_wait_time means encoding is the bottleneck, a high encoder_idle_time means
+        generation and rendering are.
+        """
+        return {
+            'frames_encoded': self.frames_encoded,
+            'queue_depth': self.queue.qsize(),
+            'max_queue_depth': self.max_queue_depth,
+            'encode_time': self.encode_time,
+            'encoder_idle_time': self.encoder_idle_time,
+            'producer_wait_time': self.producer_wait_time,
+        }
+
+
+def get_frame_sink(output_path: str, background_encoding: bool=False, fps: int=None) -> FrameSink:
+    """ Picks a sink from the extension of the output path, paths without one are treated as a png directory
+    :param background_encoding: Wrap the sink in a BackgroundSink
+    :param fps: Frame rate of videos and GIFs, each sink has its own default
+    """
+    extension = os.path.splitext(output_path)[1].lower()
+    if extension == '.gif':
+        sink = GifSink(output_path) if fps is None else GifSink(output_path, duration=int(round(1000 / fps)))
+    elif extension in ('.mp4', '.avi', '.mov'):
+        sink = VideoSink(output_path) if fps is None else VideoSink(output_path, fps)
+    else:
+        sink = PngSequenceSink(output_path)
+    if background_encoding:
+        sink = BackgroundSink(sink)
+    return sink
@@ -1,37 +1,56 @@
+import heapq
+from typing import List
 from maze_fun.maze import MazeGrid
+from maze_fun.cell import Cell
 
 
 class HuntAndKill(MazeGrid):
-    def apply_algorithm(self):
-        frames = [self.create_maze_image()]
+    def generate_steps(self):
+        # Cells are visited once they are part of the maze. The frontier is a heap of the flat indices of
+        # unvisited cells next to a visited one, popping it yields the first such cell in row major order,
+        # which is what a hunt scanning the grid from the top left finds.
+        visited = bytearray(self.size())
+        frontier = []  # type: List[int]
         current_cell = self.get_random_cell()
-        need_to_visit = self.size() - 1
+        self.mark_visited(current_cell, visited, frontier)
+        need_to_visit = self.enabled_size - 1
 
         while need_to_visit > 0:
-            neighbor = current_cell.get_random_unlinked_neighbor()
+            neighbor = current_cell.get_random_unlinked_neighbor(self.rng)
             if neighbor:
-                current_cell.link_two_cells(neighbor)
+                self.link_cells(current_cell, neighbor)
                 current_cell = neighbor
-                need_to_visit -= 1
             else:
                 # Hunt and kill tme
-                for cell in self.yield_each_cell():
-                    if not cell.get_links():  # Means that this cell is unvisted
-                        hunted_and_killed = False
-                        for neighbor in cell.get_neighbors():
-                            if neighbor.get_links():
-                                current_cell = cell
-                                current_cell.link_two_cells(neighbor)
-                                need_to_visit -= 1
-                                hunted_and_killed = True
-                                break
-                        if hunted_and_killed:
-                            break
-                frames.append(self.create_maze_image())
-        return frames
+                current_cell = self.hunt(visited, frontier)
+                for neighbor in current_cell.get_neighbors():
+                    if visited[self.flat_index(neighbor)]:
+                        self.link_cells(current_cell, neighbor)
+                        break
+            self.mark_visited(current_cell, visited, frontier)
+            need_to_visit -= 1
+            yield
+
+    def flat_index(self, cell: Cell) -> int:
+        return cell.row_num * self.cols + cell.col_num
+
+    def mark_visited(self, cell: Cell, visited: bytearray, frontier: List[int]):
+        visited[self.flat_index(cell)] = 1
+        for neighbor in cell.get_neighbors():
+            neighbor_index = self.flat_index(neighbor)
+            if neighbor.enabled and not visited[neighbor_index]:
+                heapq.heappush(frontier, neighbor_index)
+
+    def hunt(self, visited: bytearray, frontier: List[int]) -> Cell:
+        while frontier:
+            cell_index = heapq.heappop(frontier)
+            # Cells that were visited by a walk since they were pushed are skipped here
+            if not visited[cell_index]:
+                return self[divmod(cell_index, self.cols)]
+        raise Exception('Could not find an unvisited cell next to the visited ones, are the enabled cells connected?')
 
 
 if __name__ == '__main__':
     grid = HuntAndKill(20, 20)
-    grid.apply_algorithm()
+    grid.generate()
     print(grid.number_of_dead_ends())
@@ -0,0 +1,231 @@
+import cProfile
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+from maze_fun.array_grid import CellView
+from maze_fun.bfs import BFSEngine
+from maze_fun.cell import Cell
+from maze_fun.frame_sinks import GifSink, PngSequenceSink, VideoSink
+from maze_fun.maze import MazeGrid
+from maze_fun.path_solver import CellPathSolver, PathSolver
+
+
+class Instrumentation(object):
+    """ Opt-in counters and per-phase wall-clock timers for carving, searching, rendering and encoding.
+    Nothing in the hot paths checks whether it is on: enable() wraps the instrumented methods of the maze classes
+    and disable() puts the originals back, so a run without it executes exactly the original code.
+
+    Counters: cells_linked, random_draws (every call that draws from the rng of a maze, see CountingRng. Seeded
+    generators that make their own random.Random or numpy Generator are not counted), neighbor_queries,
+    nodes_expanded (BFS and path solver), frames_rendered (images drawn by create_maze_image or
+    create_animation_frame, counted once when one calls the other) and frames_encoded.
+    Phases: generation (apply_algorithm, generate and apply_hybrid_algorithm), search, render and encode. A phase
+    that is entered again while it is running is only timed once.
+
+        with Instrumentation() as instrumentation:
+            maze.apply_algorithm()
+        print(instrumentation.get_report())
+    """
+    # The instance that is enabled, only one can be at a time
+    active = None  # type: Optional[Instrumentation]
+
+    def __init__(self, listener: Callable[[str, float], None]=None):
+        """
+        :param listener: Called with (phase, seconds) every time a timed phase ends, more can be added to listeners
+        """
+        self.counters = defaultdict(int)  # type: Dict[str, int]
+        self.timers = defaultdict(float)  # type: Dict[str, float]
+        self.phase_calls = defaultdict(int)  # type: Dict[str, int]
+        self.listeners = [listener] if listener else []  # type: List[Callable[[str, float], None]]
+        self.running_phases = defaultdict(int)  # type: Dict[str, int]
+        self.originals = []
+
+    def count(self, name: str, amount: int=1):
+        self.counters[name] += amount
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        if self.running_phases[name]:
+            self.running_phases[name] += 1
+            try:
+                yield
+            finally:
+                self.running_phases[name] -= 1
+            return
+        self.running_phases[name] = 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.running_phases[name] = 0
+            self.timers[name] += seconds
+            self.phase_calls[name] += 1
+            for listener in self.listeners:
+                listener(name, seconds)
+
+    def get_report(self) -> Dict[str, Dict]:
+        return {
+            'counters': dict(self.counters),
+            'timers': dict(self.timers),
+            'phase_calls': dict(self.phase_calls),
+        }
+
+    def reset(self):
+        self.counters.clear()
+        self.timers.clear()
+        self.phase_calls.clear()
+
+    def enable(self):
+        if Instrumentation.active is not None:
+            raise Exception('Instrumentation is already enabled')
+        Instrumentation.active = self
+        for cls, name, make_wrapper in self.get_patches():
+            original = cls.__dict__[name]
+            function = original.__func__ if isinstance(original, staticmethod) else original
+            wrapper = make_wrapper(function)
+            setattr(cls, name, staticmethod(wrapper) if isinstance(original, staticmethod) else wrapper)
+            self.originals.append((cls, name, original))
+
+    def disable(self):
+        for cls, name, original in reversed(self.originals):
+            setattr(cls, name, original)
+        self.originals = []
+        if Instrumentation.active is self:
+            Instrumentation.active = None
+
+    def __enter__(self) -> 'Instrumentation':
+        self.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.disable()
+
+    def get_patches(self) -> List:
+        """
+        :return: (class, method name, wrapper factory) for every instrumented method. Generators only show up once
+        their module has been imported.
+        """
+        patches = [
+            (Cell, 'link_two_cells', self.count_links),
+            (CellView, 'link_two_cells', self.count_links),
+            (Cell, 'get_neighbors', self.counted('neighbor_queries')),
+            (MazeGrid, 'rng', self.count_draws),
+            (BFSEngine, 'search', self.count_bfs_search),
+            (PathSolver, 'get_neighbors', self.counted('nodes_expanded')),
+            (CellPathSolver, 'get_neighbors', self.counted('nodes_expanded')),
+            (MazeGrid, 'create_maze_image', self.count_frames),
+            (MazeGrid, 'create_animation_frame', self.count_frames),
+            (VideoSink, 'write_to_writer', self.counted('frames_encoded', 'encode')),
+        ]
+        for sink_class in [VideoSink, GifSink, PngSequenceSink]:
+            patches.append((sink_class, 'write', self.counted('frames_encoded', 'encode')))
+            patches.append((sink_class, 'hold', self.count_holds))
+        for cls in [MazeGrid] + get_subclasses(MazeGrid):
+            for name in ['apply_algorithm', 'generate', 'apply_hybrid_algorithm']:
+                if name in cls.__dict__:
+                    patches.append((cls, name, self.counted(None, 'generation')))
+        return patches
+
+    def counted(self, counter: Optional[str], phase: str=None) -> Callable[[Callable], Callable]:
+        def make_wrapper(function):
+            if phase is None:
+                def wrapper(*args, **kwargs):
+                    self.counters[counter] += 1
+                    return function(*args, **kwargs)
+                return wrapper
+
+            def timed_wrapper(*args, **kwargs):
+                if counter is not None:
+                    self.counters[counter] += 1
+                with self.phase(phase):
+                    return function(*args, **kwargs)
+            return timed_wrapper
+        return make_wrapper
+
+    def count_links(self, function: Callable) -> Callable:
+        def wrapper(cell, other, bidirection=True):
+            # The other side of a bidirectional link is a nested call
+            if bidirection:
+                self.counters['cells_linked'] += 1
+            return function(cell, other, bidirection)
+        return wrapper
+
+    def count_holds(self, function: Callable) -> Callable:
+        def wrapper(sink, count):
+            self.counters['frames_encoded'] += count
+            with self.phase('encode'):
+                return function(sink, count)
+        return wrapper
+
+    def count_draws(self, default_rng) -> property:
+        """ Replaces the rng class attribute of MazeGrid with a property that hands out the rng of the maze, its
+        own or the class default, wrapped in a CountingRng. Assigning an rng to a maze still works.
+        """
+        def get_rng(maze):
+            return CountingRng(maze.__dict__.get('rng', default_rng), self.counters)
+
+        def set_rng(maze, rng):
+            maze.__dict__['rng'] = rng
+        return property(get_rng, set_rng)
+
+    def count_frames(self, function: Callable) -> Callable:
+        def wrapper(*args, **kwargs):
+            # The first animation frame is drawn by create_maze_image, which is still one frame
+            if not self.running_phases['render']:
+                self.counters['frames_rendered'] += 1
+            with self.phase('render'):
+                return function(*args, **kwargs)
+        return wrapper
+
+    def count_bfs_search(self, function: Callable) -> Callable:
+        def wrapper(engine, *args, **kwargs):
+            expanded = engine.nodes_expanded
+            with self.phase('search'):
+                result = function(engine, *args, **kwargs)
+            self.counters['nodes_expanded'] += engine.nodes_expanded - expanded
+            return result
+        return wrapper
+
+
+class CountingRng(object):
+    """ Stands in for the random module or random.Random of a maze and counts every call that draws from it """
+    draw_methods = {'random', 'uniform', 'randint', 'randrange', 'choice', 'choices', 'sample', 'shuffle',
+                    'getrandbits'}
+
+    def __init__(self, rng, counters: Dict[str, int]):
+        self.rng = rng
+        self.counters = counters
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self.rng, name)
+        if name not in self.draw_methods:
+            return attribute
+
+        def draw(*args, **kwargs):
+            self.counters['random_draws'] += 1
+            return attribute(*args, **kwargs)
+        return draw
+
+
+def get_subclasses(cls) -> List:
+    subclasses = []
+    for subclass in cls.__subclasses__():
+        subclasses.append(subclass)
+        subclasses.extend(get_subclasses(subclass))
+    return subclasses
+
+
+@contextmanager
+def profile(output_path: str) -> Iterator[cProfile.Profile]:
+    """ Runs the block under cProfile and dumps the stats to output_path. The file loads with pstats and converts
+    to a flame graph with tools such as flameprof or snakeviz.
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        profiler.dump_stats(output_path)
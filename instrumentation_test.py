@@ -0,0 +1,92 @@
+import os
+import pstats
+import random
+import tempfile
+from piyush_utils.base_test_case import BaseTestCase
+from maze_fun.array_grid import CellView
+from maze_fun.binary_tree import BinaryTree
+from maze_fun.cell import Cell
+from maze_fun.frame_sinks import VideoSink
+from maze_fun.instrumentation import Instrumentation, profile
+from maze_fun.maze import MazeGrid
+from maze_fun.recursive_backtracker import RecursiveBackTracker
+from maze_fun.wilson import Wilson
+
+
+class InstrumentationTest(BaseTestCase):
+    def test_counters_and_phases(self):
+        phases = []
+        random.seed(3)
+        maze = RecursiveBackTracker(6, 5, array_backed=True)
+        with Instrumentation(lambda phase, seconds: phases.append(phase)) as instrumentation:
+            maze.generate()
+            maze.generate_bfs_distance_array([(0, 0)])
+            maze.create_maze_image()
+        report = instrumentation.get_report()
+        counters = report['counters']
+        self.assertEqual(counters['cells_linked'], 29)
+        # One random starting cell and one unlinked neighbor per link
+        self.assertEqual(counters['random_draws'], 30)
+        self.assertGreaterEqual(counters['neighbor_queries'], 29)
+        self.assertEqual(counters['nodes_expanded'], 30)
+        self.assertEqual(counters['frames_rendered'], 1)
+        self.assertEqual(report['phase_calls'], {'generation': 1, 'search': 1, 'render': 1})
+        self.assertEqual(phases, ['generation', 'search', 'render'])
+        self.assertGreater(report['timers']['generation'], 0)
+
+        with instrumentation.phase('render'):
+            with instrumentation.phase('render'):
+                pass
+        self.assertEqual(instrumentation.get_report()['phase_calls']['render'], 2)
+
+    def test_direct_draws(self):
+        with Instrumentation() as instrumentation:
+            BinaryTree(4, 5).generate()
+        # A coin flip for every cell off the north row and the east column
+        self.assertEqual(instrumentation.counters['random_draws'], 12)
+
+        state = random.getstate()
+        with Instrumentation() as instrumentation:
+            maze = Wilson(4, 5)
+            maze.rng = random.Random(1)
+            maze.generate()
+        self.assertIsInstance(maze.rng, random.Random)
+        self.assertEqual(random.getstate(), state)
+        # One random neighbor per step of the walks, plus randrange for the cells they start from
+        counters = instrumentation.counters
+        self.assertGreater(counters['random_draws'], counters['neighbor_queries'])
+        self.assertGreater(counters['neighbor_queries'], 19)
+
+    def test_animation_frames(self):
+        maze = RecursiveBackTracker(3, 3)
+        with Instrumentation() as instrumentation:
+            frames = maze.apply_algorithm()
+        # The first frame draws through create_maze_image and the other frames repeat the previous image
+        self.assertEqual(instrumentation.counters['frames_rendered'], len({id(frame) for frame in frames}))
+        self.assertEqual(instrumentation.counters['frames_rendered'], 9)
+
+    def test_disabled_leaves_no_trace(self):
+        originals = [Cell.__dict__['link_two_cells'], CellView.__dict__['link_two_cells'],
+                     MazeGrid.__dict__['rng'], VideoSink.__dict__['write_to_writer'],
+                     MazeGrid.__dict__['apply_algorithm']]
+        instrumentation = Instrumentation()
+        instrumentation.enable()
+        with self.assertRaises(Exception):
+            Instrumentation().enable()
+        self.assertIsInstance(VideoSink.__dict__['write_to_writer'], staticmethod)
+        instrumentation.disable()
+        self.assertEqual([Cell.__dict__['link_two_cells'], CellView.__dict__['link_two_cells'],
+                          MazeGrid.__dict__['rng'], VideoSink.__dict__['write_to_writer'],
+                          MazeGrid.__dict__['apply_algorithm']], originals)
+        self.assertIsNone(Instrumentation.active)
+
+        RecursiveBackTracker(4, 4).apply_algorithm()
+        self.assertEqual(instrumentation.get_report()['counters'], {})
+
+    def test_profile(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output_path = os.path.join(directory, 'maze.prof')
+            with profile(output_path):
+                RecursiveBackTracker(5, 5).apply_algorithm()
+            functions = {function for _, _, function in pstats.Stats(output_path).stats}
+        self.assertIn('generate_steps', functions)
@@ -1,22 +1,67 @@
+import numpy as np
 from maze_fun.maze import MazeGrid
 from maze_fun.recursive_backtracker import RecursiveBackTracker
 from PIL import Image
 
 
 class Masks(object):
+    # Pixels brighter than this are masked out
+    threshold = 60
+
     @staticmethod
-    def create_maze_from_image(image_path: str):
-        image = Image.open(image_path)
-        bw_image = image.convert('L')
-        width, height = image.size
-        maze = RecursiveBackTracker(height, width)
-        for i in range(width):
-            for j in range(height):
-                pixel_value = bw_image.getpixel((i, j))
-                if pixel_value > 60:
-                    maze.disable_cell(j, i)
+    def create_maze_from_image(image_path: str, maze_class=RecursiveBackTracker, threshold: int=threshold,
+                               array_backed: bool=False) -> MazeGrid:
+        """ Creates a maze with one cell per pixel of the image, where the bright pixels are disabled """
+        return Masks.create_maze_from_mask(Masks.read_image_mask(image_path, threshold), maze_class, array_backed)
+
+    @staticmethod
+    def create_maze_from_text(text_path: str, maze_class=RecursiveBackTracker, array_backed: bool=False,
+                              rows: int=None, cols: int=None) -> MazeGrid:
+        """ Creates a maze from a text mask, see read_text_mask for rows and cols """
+        with open(text_path) as f:
+            mask = Masks.read_text_mask(f.read(), rows, cols)
+        return Masks.create_maze_from_mask(mask, maze_class, array_backed)
+
+    @staticmethod
+    def create_maze_from_mask(mask: np.ndarray, maze_class=RecursiveBackTracker,
+                              array_backed: bool=False) -> MazeGrid:
+        """
+        :param mask: (rows, cols) bool array that is True for the enabled cells
+        :param maze_class: Any MazeGrid generator
+        """
+        rows, cols = mask.shape
+        maze = maze_class(rows, cols, array_backed=array_backed)
+        maze.set_enabled_mask(mask)
         return maze
 
+    @staticmethod
+    def read_image_mask(image_path: str, threshold: int=threshold) -> np.ndarray:
+        """
+        :return: (height, width) bool array that is True for the pixels no brighter than the threshold
+        """
+        return np.asarray(Image.open(image_path).convert('L')) <= threshold
+
+    @staticmethod
+    def read_text_mask(text: str, rows: int=None, cols: int=None) -> np.ndarray:
+        """ Reads a mask drawn like mask-sample.txt, where every enabled cell is a box of 4 by 2 characters whose
+        four corners are a '+'. Disabled cells have at least one corner missing, so a disabled cell that is
+        completely surrounded by enabled cells can not be told apart from an enabled one.
+        The shape comes from the number of lines and the longest line, as create_maze_string writes them, so
+        disabled rows and columns at the end are blank lines and trailing spaces.
+        :param rows: Number of rows, for text whose trailing blank lines were stripped
+        :param cols: Number of columns, for text whose trailing spaces were stripped
+        :return: (rows, cols) bool array that is True for the enabled cells
+        """
+        lines = text.split('\n')
+        if lines[-1] == '':
+            lines.pop()
+        rows = len(lines) // 2 if rows is None else rows
+        cols = max((len(line) for line in lines), default=0) // 4 if cols is None else cols
+        lines += [''] * (2 * rows + 1 - len(lines))
+        chars = np.array([list(line.ljust(4 * cols + 1)[:4 * cols + 1]) for line in lines[:2 * rows + 1]])
+        corners = chars[::2, ::4] == '+'
+        return corners[:-1, :-1] & corners[:-1, 1:] & corners[1:, :-1] & corners[1:, 1:]
+
     @staticmethod
     def resize_image(original_image_path: str, output_image_path: str, scaling_factor):
         image = Image.open(original_image_path)
@@ -0,0 +1,84 @@
+import os
+import tempfile
+import numpy as np
+from PIL import Image
+from piyush_utils.base_test_case import BaseTestCase
+from maze_fun.masks import Masks
+from maze_fun.maze import MazeGrid
+from maze_fun.recursive_backtracker import RecursiveBackTracker
+from maze_fun.wilson import Wilson
+
+
+class MasksTest(BaseTestCase):
+    def test_text_mask(self):
+        file_path = os.path.join(os.path.dirname(__file__), 'mask-sample.txt')
+        maze = Masks.create_maze_from_text(file_path, Wilson)
+        expected = np.array([[0, 1, 1, 1, 0],
+                             [0, 0, 1, 0, 0],
+                             [0, 0, 1, 0, 0],
+                             [0, 0, 1, 0, 0],
+                             [0, 1, 1, 1, 0],
+                             [0, 0, 0, 0, 0]], dtype=bool)
+        self.assertTrue(np.array_equal(maze.get_enabled_array(), expected))
+        self.assertEqual(maze.enabled_size, 9)
+        maze.generate()
+        self.assertEqual(len(maze.find_path((0, 1), (4, 3))), 7)
+
+    def test_text_mask_disabled_last_row_and_column(self):
+        lines = ['+---+---+        ',
+                 '|       |        ',
+                 '+---+---+---+    ',
+                 '    |       |    ',
+                 '    +---+---+    ',
+                 '                 ',
+                 '                 ']
+        expected = np.array([[1, 1, 0, 0],
+                             [0, 1, 1, 0],
+                             [0, 0, 0, 0]], dtype=bool)
+        self.assertTrue(np.array_equal(Masks.read_text_mask('\n'.join(lines) + '\n'), expected))
+        # Without the trailing spaces and blank lines the shape has to be given
+        stripped = '\n'.join(line.rstrip() for line in lines).rstrip()
+        self.assertEqual(Masks.read_text_mask(stripped).shape, (2, 3))
+        self.assertTrue(np.array_equal(Masks.read_text_mask(stripped, 3, 4), expected))
+
+    def test_image_mask(self):
+        pixels = np.full((5, 8), 255, dtype=np.uint8)
+        pixels[1:4, 2:7] = 30
+        pixels[2, 4] = 61
+        with tempfile.TemporaryDirectory() as directory:
+            image_path = os.path.join(directory, 'mask.png')
+            Image.fromarray(pixels).save(image_path)
+            for array_backed in [False, True]:
+                maze = Masks.create_maze_from_image(image_path, RecursiveBackTracker, array_backed=array_backed)
+                self.assertEqual((maze.rows, maze.cols), (5, 8))
+                self.assertEqual(maze.enabled_size, 14)
+                self.assertFalse(maze[2, 4].enabled)
+                self.assertTrue(maze[1, 2].enabled)
+                maze.generate()
+                self.assertEqual(maze.get_stats().cells, 14)
+                self.assertEqual(maze.get_stats().degree_histogram[0], 0)
+
+    def test_bulk_enable_and_disable(self):
+        for array_backed in [False, True]:
+            maze = MazeGrid(4, 5, array_backed=array_backed)
+            version = maze.version
+            mask = np.zeros((4, 5), dtype=bool)
+            mask[1:3, 1:4] = True
+            maze.disable_cells(mask)
+            maze.disable_cells(mask)
+            self.assertEqual(maze.enabled_size, 14)
+            self.assertFalse(maze[2, 3].enabled)
+            self.assertNotIn((2, 3), maze.enabled_index)
+            self.assertGreater(maze.version, version)
+            mask[:] = False
+            mask[2, 3] = True
+            maze.enable_cells(mask)
+            self.assertEqual(maze.enabled_size, 15)
+            self.assertTrue(maze[2, 3].enabled)
+            self.assertEqual(sorted(maze.enabled_index), sorted(zip(*np.nonzero(maze.get_enabled_array()))))
+            # The index keeps working with single cell updates
+            maze.disable_cell(0, 0)
+            maze.enable_cell(1, 1)
+            self.assertEqual(maze.enabled_size, 15)
+            with self.assertRaises(Exception):
+                maze.set_enabled_mask(np.ones((2, 2), dtype=bool))
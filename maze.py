@@ -1,9 +1,23 @@
 import os
+import itertools
 import cv2
 import numpy as np
-from typing import Optional, List, Tuple, Dict
-from random import randint, choice
-from maze_fun.cell import Cell
+from typing import Optional, List, Tuple, Dict, Iterable, Iterator, TextIO, Union
+import random
+from maze_fun.cell import Cell, StructureVersion
+from maze_fun.bfs import BFSEngine
+from maze_fun.analytics import MazeStats, analyze_passages, get_degree_array
+from maze_fun.distance_cache import DistanceCache
+from maze_fun.path_solver import CellPathSolver, PathSolver
+from maze_fun.tiled import TiledGenerator
+from maze_fun.canvas_renderer import CanvasRenderer
+from maze_fun.tile_renderer import TileRenderer
+from maze_fun.strip_renderer import StripRenderer
+from maze_fun.svg_exporter import SvgExporter
+from maze_fun.frame_sinks import BackgroundSink, FrameSink, GifSink, HoldFrame, VideoSink, get_frame_sink
+from maze_fun.frame_scheduler import FrameScheduler
+from maze_fun.enabled_cell_index import EnabledCellIndex
+from maze_fun.array_grid import ArrayGrid, NORTH, SOUTH, EAST, WEST, passages_from_south_east
 from PIL import Image, ImageDraw, ImageFont
 
 
@@ -13,20 +27,64 @@ class MazeGrid(object):
     fill_blue = (0, 0, 255)
     default_cell_size = 100
     maze_wall_width = 5
-
-    def __init__(self, rows: int, cols: int):
+    # Where the generators draw their random numbers from. Assigning a random.Random to the rng of a maze gives it
+    # its own stream and leaves the state of the global random module alone.
+    rng = random
+    # Whether generate leaves disabled cells alone, the generators that carve every cell regardless set it to False
+    respects_disabled_cells = True
+    # Carving steps between two frames of iterate_frames
+    frame_stride = 1
+    # Number of frames iterate_frames fits the whole generation into, None renders a frame every frame_stride steps
+    animation_frames = None  # type: Optional[int]
+    # How create_maze_path_frames divides a frame budget between the generation, the path and holding the result
+    path_frame_weights = (6, 3, 1)
+    # Frames the finished path is held for when there is no frame budget
+    path_hold_frames = 15
+
+    def __init__(self, rows: int, cols: int, array_backed: bool=False):
+        """
+        :param rows:
+        :param cols:
+        :param array_backed: Keep the link state in numpy arrays (see ArrayGrid) instead of one Cell per position.
+        Cells returned by __getitem__ are then lightweight CellView objects.
+        """
         self.rows = rows
         self.cols = cols
+        self.array_backed = array_backed
+        # Bumped by every link, unlink, enable and disable of a cell
+        self.structure_version = StructureVersion()
         self.grid = self.init_starting_grid()
         self.configure_cells()
-        self.enabled_map = self.create_enabled_map()
-        self.enabled_size = self.size()
-
-    def create_enabled_map(self) -> Dict[Tuple, bool]:
-        output = {}
-        for cell in self.yield_each_cell():
-            output[cell.pos] = True
-        return output
+        self.enabled_index = EnabledCellIndex(rows, cols)
+        self.distance_cache = DistanceCache()
+        # (version, passages) of the last passage array built from the cells of a Cell backed maze
+        self.passage_cache = None  # type: Optional[Tuple[int, np.ndarray]]
+        # Callables invoked as listener(cell, other) after link_cells carves a passage
+        self.link_listeners = []
+        self.canvas_renderer = None  # type: Optional[CanvasRenderer]
+
+    @property
+    def enabled_size(self) -> int:
+        return len(self.enabled_index)
+
+    @property
+    def version(self) -> int:
+        return self.structure_version.value
+
+    def link_cells(self, cell: Cell, other: Cell):
+        """ Links two cells and notifies the link listeners. Generators should carve through this method. """
+        cell.link_two_cells(other)
+        for listener in self.link_listeners:
+            listener(cell, other)
+
+    def create_animation_frame(self) -> Image:
+        """ Same output as create_maze_image() but drawn incrementally on a CanvasRenderer that follows
+        link_cells, so every frame after the first only costs the walls that changed.
+        """
+        if self.canvas_renderer is None:
+            self.canvas_renderer = CanvasRenderer(self)
+            self.link_listeners.append(self.canvas_renderer.on_link)
+        return self.canvas_renderer.get_frame()
 
     def disable_cell(self, row: int, col: int):
         cell = self[row, col]
@@ -34,7 +92,7 @@ class MazeGrid(object):
             raise Exception('Could not find a cell mapped at  {0} and {1}'.format(row, col))
         if cell.enabled:
             cell.disable_cell()
-            self.enabled_size -= 1
+            self.enabled_index.remove(row, col)
         else:
             raise Exception('Trying to disable a cell that is already disabled')
 
@@ -44,91 +102,214 @@ class MazeGrid(object):
             raise Exception('Could not find a cell mapped at  {0} and {1}'.format(row, col))
         if not cell.enabled:
             cell.enable_cell()
-            self.enabled_size += 1
+            self.enabled_index.add(row, col)
         else:
             raise Exception('Trying to enable a cell that is already enabled')
 
+    def set_enabled_mask(self, mask: np.ndarray):
+        """ Enables exactly the cells that are True in a (rows, cols) bool mask, in one step instead of one
+        enable_cell or disable_cell call per cell. Meant to be applied before the maze is carved.
+        """
+        mask = np.asarray(mask, dtype=bool)
+        if mask.shape != (self.rows, self.cols):
+            raise Exception('Mask of shape {0} does not fit a {1}x{2} maze'.format(mask.shape, self.rows, self.cols))
+        if self.array_backed:
+            self.grid.enabled[:] = mask
+        else:
+            for row, col in zip(*np.nonzero(mask != self.get_enabled_array())):
+                self.grid[row][col].enabled = bool(mask[row, col])
+        self.enabled_index.set_mask(mask)
+        self.structure_version.bump()
+        if self.canvas_renderer is not None:
+            self.link_listeners.remove(self.canvas_renderer.on_link)
+            self.canvas_renderer = None
+
+    def disable_cells(self, mask: np.ndarray):
+        """ Disables every cell that is True in the mask, cells that already are disabled are left alone """
+        self.set_enabled_mask(self.get_enabled_array() & ~np.asarray(mask, dtype=bool))
+
+    def enable_cells(self, mask: np.ndarray):
+        """ Enables every cell that is True in the mask, cells that already are enabled are left alone """
+        self.set_enabled_mask(self.get_enabled_array() | np.asarray(mask, dtype=bool))
+
+    def get_passage_array(self) -> np.ndarray:
+        """ Returns the N/S/E/W passage bitmask (see array_grid) of the maze regardless of how it is stored.
+        A Cell backed maze has to visit every cell to build it, so the array is cached until the maze changes and
+        is read only.
+        """
+        if self.array_backed:
+            return self.grid.passages
+        if self.passage_cache is not None and self.passage_cache[0] == self.version:
+            return self.passage_cache[1]
+        south = np.zeros((self.rows, self.cols), dtype=bool)
+        east = np.zeros((self.rows, self.cols), dtype=bool)
+        for row in self.grid:
+            for cell in row:
+                for other in cell.links:
+                    if other.row_num > cell.row_num:
+                        south[cell.row_num, cell.col_num] = True
+                    elif other.col_num > cell.col_num:
+                        east[cell.row_num, cell.col_num] = True
+        passages = passages_from_south_east(south, east)
+        passages.flags.writeable = False
+        self.passage_cache = (self.version, passages)
+        return passages
+
+    def load_passage_array(self, passages: np.ndarray):
+        """ Replaces the links of the maze with the ones described by a N/S/E/W passage bitmask.
+        """
+        if passages.shape != (self.rows, self.cols):
+            raise Exception('Passage array of shape {0} does not fit a {1}x{2} maze'.format(passages.shape,
+                                                                                        self.rows, self.cols))
+        if self.canvas_renderer is not None:
+            self.link_listeners.remove(self.canvas_renderer.on_link)
+            self.canvas_renderer = None
+        self.structure_version.bump()
+        if self.array_backed:
+            self.grid.passages = np.array(passages, dtype=np.uint8)
+            return
+        for cell in self.yield_each_cell():
+            cell.links.clear()
+        for row, col in zip(*np.nonzero(passages & SOUTH)):
+            self[int(row), int(col)].link_two_cells(self[int(row) + 1, int(col)])
+        for row, col in zip(*np.nonzero(passages & EAST)):
+            self[int(row), int(col)].link_two_cells(self[int(row), int(col) + 1])
+
+    def apply_tiled_algorithm(self, tile_rows: int=64, tile_cols: int=None, workers: int=1, seed: int=None):
+        """ Carves the maze as independently generated tiles that are stitched together, see TiledGenerator.
+        Disabled cells are respected, generators that ignore them can only carve a maze without any.
+        """
+        generator = TiledGenerator(type(self), tile_rows, tile_cols, workers)
+        self.load_passage_array(generator.generate_passages(self.get_enabled_array(), seed))
+
+    def load_passage_rows(self, rows: Iterable[Tuple[np.ndarray, np.ndarray]]):
+        """ Replaces the links of the maze with rows of (east, north) bool arrays, as produced by the
+        stream_rows generators.
+        """
+        south = np.zeros((self.rows, self.cols), dtype=bool)
+        east = np.zeros((self.rows, self.cols), dtype=bool)
+        for row, (row_east, row_north) in enumerate(rows):
+            east[row] = row_east
+            if row > 0:
+                south[row - 1] = row_north
+        self.load_passage_array(passages_from_south_east(south, east))
+
     def init_starting_grid(self):
+        if self.array_backed:
+            grid = ArrayGrid(self.rows, self.cols)
+            grid.structure_version = self.structure_version
+            return grid
         grid = []
         for row_num in range(self.rows):
             row = []
             for col_num in range(self.cols):
                 new_cell = Cell(row_num, col_num)
+                new_cell.structure_version = self.structure_version
                 row.append(new_cell)
             grid.append(row)
         return grid
 
     def create_maze_string(self, distance_map: Dict=None):
-        maze_list = []
-        bottom_border = ''
+        return '\n'.join(self.iterate_maze_string_lines(distance_map))
+
+    def write_maze_string(self, f: TextIO, distance_map: Dict=None):
+        """ Writes the same text as create_maze_string to a file object, one line at a time """
+        for i, line in enumerate(self.iterate_maze_string_lines(distance_map)):
+            if i:
+                f.write('\n')
+            f.write(line)
+
+    def iterate_maze_string_lines(self, distance_map: Dict=None) -> Iterator[str]:
+        """ Yields the two lines of text of every row followed by the bottom border """
         space_4 = ' ' * 4
         for row in self.each_row():
-            upper_border = ''
-            corrider = ''
+            upper_border = []
+            corrider = []
             for col in self.each_col():
                 cell = self[row, col]
                 if cell.enabled:
                     if cell.north and cell.north.enabled and cell.is_linked(cell.north):
                         # Draw horizontal wall
-                        upper_border += '+   '
+                        upper_border.append('+   ')
                     else:
-                        upper_border += '+---'
+                        upper_border.append('+---')
+                    label = self.get_distance_label(distance_map, row, col)
                     if cell.left and cell.left.enabled and cell.is_linked(cell.left):
-                        corrider += space_4
+                        corrider.append(' ' + label)
                     else:
-                        corrider += '|   '
+                        corrider.append('|' + label)
 
                     if not cell.right:
-                        corrider += '|'
+                        corrider.append('|')
                         # upper_border += '+'
                 else:
                     if cell.left and cell.left.enabled:
-                        corrider += '|  '
+                        corrider.append('|  ')
                         if upper_border:
-                            upper_border += '+'
+                            upper_border.append('+')
                     else:
-                        corrider += '    '
+                        corrider.append('    ')
                     if cell.north and cell.north.enabled:
-                        upper_border += '+---'
+                        upper_border.append('+---')
                     else:
-                        upper_border += space_4
-
-
-            maze_list.append(upper_border)
-            maze_list.append(corrider)
+                        upper_border.append(space_4)
+            yield ''.join(upper_border)
+            yield ''.join(corrider)
+        bottom_border = []
         for i in range(self.cols):
             cell = self[self.rows - 1, i]
             if cell.enabled:
-                bottom_border += '+---'
+                bottom_border.append('+---')
             else:
-                bottom_border += space_4
-        maze_list.append(bottom_border)
-        return '\n'.join(maze_list)
+                bottom_border.append(space_4)
+        yield ''.join(bottom_border)
+
+    def get_distance_label(self, distance_map, row: int, col: int) -> str:
+        """ Returns the 3 character body of a cell, showing its distance when the distance map has one.
+        :param distance_map: Dict keyed by (row, col) or a distance array where unreached cells are negative
+        """
+        if distance_map is None:
+            return '   '
+        if isinstance(distance_map, np.ndarray):
+            distance = int(distance_map[row, col])
+            if distance < 0:
+                return '   '
+        elif (row, col) in distance_map:
+            distance = distance_map[row, col]
+        else:
+            return '   '
+        return ' {0} '.format(self.convert_num_to_maze_distance(distance))
 
     def create_maze_string_with_distance(self, starting_node: Tuple[int, int]):
         """
         :param starting_node:
         :return:
         """
-        distance_map = self.generate_bfs_distance_map(starting_node)
-        return self.create_maze_string(distance_map)
+        return self.create_maze_string(self.get_distance_array(starting_node))
+
+    def get_path_solver(self) -> PathSolver:
+        """ A Cell backed maze gets a solver that follows the links of the cells it reaches, so a short path costs
+        nothing even when the passage array isn't cached
+        """
+        if self.array_backed:
+            return PathSolver(self.get_passage_array())
+        return CellPathSolver(self.grid)
+
+    def find_path(self, starting_node: Tuple[int, int], ending_node: Tuple[int, int],
+                  method: str='bidirectional') -> List[Tuple[int, int]]:
+        """ Shortest path between two nodes, see PathSolver.find_path for the methods """
+        return self.get_path_solver().find_path(starting_node, ending_node, method)
 
     def get_stripped_dist_map_between_two_nodes(self, starting_node: Tuple[int, int],
                                                 ending_node: Tuple[int, int]) -> Dict[Tuple[int, int], int]:
-        distance_map = self.generate_bfs_distance_map(starting_node)
-        stripped_distance_map = {}
-        current_node = ending_node
-        current_distance_to_starting_node = distance_map[current_node]
-        stripped_distance_map[ending_node] = distance_map[ending_node]
-        while current_distance_to_starting_node > 0:
-            cell = self[current_node]
-            current_distance_to_starting_node = distance_map[current_node]
-            for n in cell.get_links():
-                if distance_map[n.pos] == current_distance_to_starting_node - 1:
-                    current_node = n.pos
-                    stripped_distance_map[n.pos] = distance_map[n.pos]
-                    break
-        return stripped_distance_map
+        # A cached BFS from either end already holds the path
+        if self.distance_cache.peek(ending_node, self.version) is not None:
+            path = self.get_path_solver().descend(self.get_distance_array(ending_node), starting_node)
+        elif self.distance_cache.peek(starting_node, self.version) is not None:
+            path = self.get_path_solver().descend(self.get_distance_array(starting_node), ending_node)[::-1]
+        else:
+            path = self.find_path(starting_node, ending_node)
+        return {node: dist for dist, node in enumerate(path)}
 
     def create_maze_string_with_path(self, starting_node: Tuple[int, int], ending_node: Tuple[int, int]):
         stripped_distance_map = self.get_stripped_dist_map_between_two_nodes(starting_node, ending_node)
@@ -138,29 +319,62 @@ class MazeGrid(object):
         return self.default_cell_size*self.cols + self.maze_wall_width, \
                self.default_cell_size*self.rows + self.maze_wall_width
 
-    def create_maze_path_frames(self):
-        video_writer = self.apply_algorithm('test.mp4')
+    def create_maze_path_frames(self, output_path: str='test.mp4', stride: int=None,
+                                background_encoding: bool=True, frames: int=None, duration: float=None,
+                                fps: int=None) -> FrameSink:
+        """ Animates the generation of the maze followed by the path between its two furthest nodes.
+        Frames are streamed into a sink picked from the output path (see frame_sinks.get_frame_sink).
+        :param background_encoding: Encode on a separate thread while the next frames are generated
+        :param frames: Total number of frames, split between the parts by path_frame_weights (see FrameScheduler).
+        Without frames or duration every stride carving steps and every path node gets a frame.
+        :param duration: Length in seconds at fps, used when frames is not given
+        :param fps: Frame rate of the output, FrameScheduler.default_fps when a duration is given and the sink
+        default otherwise
+        :return: The sink that was used, a BackgroundSink can report its stats
+        """
+        if fps is None and duration is not None:
+            fps = FrameScheduler.default_fps
+        frame_count = FrameScheduler.get_frame_count(frames, duration, fps)
+        if frame_count is None:
+            frames = itertools.chain(self.iterate_frames(stride), self.iterate_path_frames())
+        else:
+            generation_frames, path_frames, hold_frames = FrameScheduler(frame_count).split(self.path_frame_weights)
+            frames = itertools.chain(self.iterate_frames(frames=generation_frames),
+                                     self.iterate_path_frames(path_frames, hold_frames))
+        sink = get_frame_sink(output_path, background_encoding, fps)
+        sink.consume(frames)
+        return sink
+
+    def iterate_path_frames(self, frames: int=None,
+                            hold_frames: int=None) -> Iterator[Union[Image.Image, HoldFrame]]:
+        """ Draws the path between the two furthest nodes one node at a time
+        :param frames: Frames to spread the path over, by default one for the maze and one for every node
+        :param hold_frames: Frames the finished path is held for, defaults to path_hold_frames
+        """
         cell_size = self.default_cell_size
         path_margin = 30
         image_size = self.get_base_image_size()
         starting_node, ending_node = self.determine_nodes_with_greatest_separation()
-        frame_with_start_and_end_points = self.create_maze_image(None, starting_node, ending_node, False)
-        self.place_frame_on_background_and_write_to_video_file(frame_with_start_and_end_points, video_writer,
-                                                               image_size)
+        last_frame = self.create_maze_image(None, starting_node, ending_node, False)
         stripped_dist_map = self.get_stripped_dist_map_between_two_nodes(starting_node, ending_node)
-        last_frame = frame_with_start_and_end_points
-        for node, dist in sorted(stripped_dist_map.items(), key=lambda kv: kv[1]):
-            row, col = node
-            drawer = ImageDraw.Draw(last_frame)
-            rectangle_loc = [col*cell_size + path_margin,
-                             row*cell_size + path_margin,
-                             (col+1)*cell_size - path_margin,
-                             (row+1)*cell_size - path_margin]
-            drawer.rectangle(rectangle_loc, fill=self.fill_blue)
-
-            self.place_frame_on_background_and_write_to_video_file(last_frame, video_writer, image_size)
-        for i in range(15):
-            self.place_frame_on_background_and_write_to_video_file(last_frame, video_writer, image_size)
+        drawer = ImageDraw.Draw(last_frame)
+        path = [node for node, dist in sorted(stripped_dist_map.items(), key=lambda kv: kv[1])]
+
+        def draw_path():
+            for row, col in path:
+                rectangle_loc = [col*cell_size + path_margin,
+                                 row*cell_size + path_margin,
+                                 (col+1)*cell_size - path_margin,
+                                 (row+1)*cell_size - path_margin]
+                drawer.rectangle(rectangle_loc, fill=self.fill_blue)
+                yield
+
+        frames = len(path) + 1 if frames is None else frames
+        yield from FrameScheduler.iterate(draw_path(), len(path), frames,
+                                          lambda: self.place_maze_on_background(last_frame, image_size))
+        hold_frames = self.path_hold_frames if hold_frames is None else hold_frames
+        if hold_frames:
+            yield HoldFrame(hold_frames)
 
     def place_frame_on_background_and_write_to_video_file(self, frame: Image, writer: cv2.VideoWriter, image_size):
         copied_frame = frame.copy()
@@ -180,8 +394,61 @@ class MazeGrid(object):
 
     def create_maze_image(self, distance_map: Dict=None, starting_node: Tuple[int, int]=None,
                           ending_node: Tuple[int, int]=None, place_on_background: bool=True) -> Image:
+        """ Renders the maze by compositing pre-rendered wall tiles (see TileRenderer). The output is pixel for
+        pixel the same as create_maze_image_from_segments, which draws every wall as its own line and is used
+        instead for cell sizes the tiles don't suit.
+        """
+        if not TileRenderer.suits(self.default_cell_size, self.maze_wall_width):
+            return self.create_maze_image_from_segments(distance_map, starting_node, ending_node, place_on_background)
+        image_size = self.get_base_image_size()
+        tile_renderer = TileRenderer(self.default_cell_size, self.maze_wall_width)
+        image = tile_renderer.render(self.get_wall_array(), image_size, self.fill_white, self.fill_black)
+        return self.finish_maze_image(image, starting_node, ending_node, place_on_background)
+
+    def get_strip_renderer(self, place_on_background: bool=True, strip_rows: int=8) -> StripRenderer:
+        border = self.get_background_margin() if place_on_background else 0
+        return StripRenderer(self.get_wall_array(), self.default_cell_size, self.maze_wall_width, strip_rows, border)
+
+    def write_maze_png(self, output_path: str, place_on_background: bool=True, strip_rows: int=8):
+        """ Writes the walls of create_maze_image to a PNG a strip of rows at a time, for mazes whose image is too
+        large to hold in memory. Start and end tags are not drawn.
+        """
+        with open(output_path, 'wb') as f:
+            self.get_strip_renderer(place_on_background, strip_rows).write_png(f, self.fill_white, self.fill_black)
+
+    def create_maze_image_memmap(self, output_path: str, place_on_background: bool=True,
+                                 strip_rows: int=8) -> np.memmap:
+        """ Same as write_maze_png, but into a memory mapped (height, width, 3) .npy array of RGB pixels """
+        renderer = self.get_strip_renderer(place_on_background, strip_rows)
+        return renderer.write_memmap(output_path, self.fill_white, self.fill_black)
+
+    def save_maze_svg(self, output_path: str, place_on_background: bool=True, compress: bool=None):
+        """ Writes the walls as an SVG path with touching collinear walls merged into single lines, see
+        SvgExporter. Start and end tags are not drawn.
+        :param compress: gzip the output, by default only when the path ends in .svgz or .gz
+        """
+        border = self.get_background_margin() if place_on_background else 0
+        exporter = SvgExporter(self.get_wall_array(), self.default_cell_size, self.maze_wall_width, self.fill_white,
+                               self.fill_black, border)
+        exporter.save(output_path, compress)
+
+    def get_wall_array(self) -> np.ndarray:
+        """ Returns the N/S/E/W bits of the walls every cell draws, disabled cells draw none """
+        walls = ~self.get_passage_array() & np.uint8(NORTH | SOUTH | EAST | WEST)
+        walls[~self.get_enabled_array()] = 0
+        return walls
+
+    def get_enabled_array(self) -> np.ndarray:
+        if self.array_backed:
+            return self.grid.enabled
+        enabled = np.zeros(self.rows * self.cols, dtype=bool)
+        enabled[self.enabled_index.flat_indices()] = True
+        return enabled.reshape(self.rows, self.cols)
+
+    def create_maze_image_from_segments(self, distance_map: Dict=None, starting_node: Tuple[int, int]=None,
+                                        ending_node: Tuple[int, int]=None, place_on_background: bool=True) -> Image:
         cell_size = self.default_cell_size
-        maze_width = 5
+        maze_width = self.maze_wall_width
         image_size = self.get_base_image_size()
         image = Image.new('RGB', image_size, color=self.fill_white)
         drawer = ImageDraw.Draw(image)
@@ -208,12 +475,18 @@ class MazeGrid(object):
         for segment in all_possible_line_segments:
             coords = [coord * cell_size for coord in segment]
             drawer.line(coords, width=maze_width, fill=self.fill_black)
+        return self.finish_maze_image(image, starting_node, ending_node, place_on_background)
+
+    def finish_maze_image(self, image: Image, starting_node: Tuple[int, int]=None, ending_node: Tuple[int, int]=None,
+                          place_on_background: bool=True) -> Image:
+        cell_size = self.default_cell_size
+        drawer = ImageDraw.Draw(image)
         if starting_node:
             self.mark_node_with_tag(starting_node, cell_size, drawer, 'start')
         if ending_node:
             self.mark_node_with_tag(ending_node, cell_size, drawer, 'end')
         if place_on_background:
-            image = self.place_maze_on_background(image, image_size)
+            image = self.place_maze_on_background(image, self.get_base_image_size())
         return image
 
     @staticmethod
@@ -247,9 +520,13 @@ class MazeGrid(object):
                 segment_set.add(east_segment)
         return segment_set
 
+    @staticmethod
+    def get_background_margin() -> int:
+        return MazeGrid.default_cell_size*2
+
     @staticmethod
     def place_maze_on_background(maze_image: Image, image_size: Tuple[int, int]) -> Image:
-        margin = MazeGrid.default_cell_size*2
+        margin = MazeGrid.get_background_margin()
         background_image_size = (image_size[0] + 2*margin, image_size[1] + 2*margin)
         background = Image.new('RGB', background_image_size, color=MazeGrid.fill_white)
         background.paste(maze_image, (margin, margin))
@@ -289,6 +566,9 @@ class MazeGrid(object):
         return font
 
     def configure_cells(self):
+        if self.array_backed:
+            # Views compute their neighbors on demand
+            return
         for row in range(self.rows):
             for col in range(self.cols):
                 cell = self[(row, col)]
@@ -303,19 +583,13 @@ class MazeGrid(object):
             return None
         if col < 0 or col >= self.cols:
             return None
+        if self.array_backed:
+            return self.grid.cell(row, col)
         return self.grid[row][col]
 
     def get_random_cell(self) -> Cell:
-        cell_seq_num = randint(0, self.enabled_size - 1)
-        enabled_seen_so_far = 0
-        for row in self.each_row():
-            for col in self.each_col():
-                cell = self[row, col]
-                if cell.enabled:
-                    if enabled_seen_so_far == cell_seq_num:
-                        return cell
-                    else:
-                        enabled_seen_so_far += 1
+        cell_seq_num = self.rng.randint(0, self.enabled_size - 1)
+        return self[self.enabled_index[cell_seq_num]]
 
     def size(self):
         return self.rows * self.cols
@@ -328,53 +602,52 @@ class MazeGrid(object):
         for col in range(self.cols):
             yield col
 
-    @staticmethod
-    def coin_flip() -> str:
-        return choice(['heads', 'tails'])
-
-    def generate_bfs_distance_map(self, starting_node: Tuple[int, int]):
-        q, next_q = [starting_node], []
-        dist_map = {}
-        current_dist = 0
-        while q:
-            selected = q.pop(0)
-            dist_map[selected] = current_dist
-            cell = self[selected]
-            for link in cell.links:
-                link_pos = link.pos
-                if link_pos in dist_map:
-                    continue
-                next_q.append(link_pos)
+    def coin_flip(self) -> str:
+        return self.rng.choice(['heads', 'tails'])
+
+    def generate_bfs_distance_map(self, starting_node: Tuple[int, int]) -> Dict[Tuple[int, int], int]:
+        """ Dict version of get_distance_array with an entry for every reachable node """
+        distances = self.get_distance_array(starting_node)
+        rows, cols = np.nonzero(distances >= 0)
+        return dict(zip(zip(rows.tolist(), cols.tolist()), distances[rows, cols].tolist()))
 
-            if not q:
-                current_dist += 1
-                q = next_q
-                next_q = []
-        return dist_map
+    def get_bfs_engine(self) -> BFSEngine:
+        return BFSEngine(self.get_passage_array())
+
+    def generate_bfs_distance_array(self, starting_nodes: List[Tuple[int, int]], target: Tuple[int, int]=None,
+                                    max_radius: int=None, with_parents: bool=False):
+        """ Array based version of generate_bfs_distance_map. See BFSEngine.search for the parameters.
+        :return: (distances, parents) arrays of shape (rows, cols), unreached cells have a distance of -1
+        """
+        return self.get_bfs_engine().search(starting_nodes, target, max_radius, with_parents)
+
+    def get_distance_array(self, source: Tuple[int, int]) -> np.ndarray:
+        """ Distances of every cell from source (-1 when unreachable), cached until the maze changes.
+        The returned array is shared with the cache and read only.
+        """
+        distances = self.distance_cache.get(source, self.version)
+        if distances is None:
+            distances, _ = self.get_bfs_engine().search([source])
+            self.distance_cache.put(source, self.version, distances)
+        return distances
 
     def determine_nodes_with_greatest_separation(self):
         """ This method will return two nodes that have the greatest distance between them.
         :return:
         """
         random_cell = self.get_random_cell()
-        dist_map = self.generate_bfs_distance_map(random_cell.pos)
-        first_furthest_node, first_furthest_dist = None, 0
-
-        for node in sorted(dist_map.keys()):
-            if dist_map[node] > first_furthest_dist:
-                first_furthest_node = node
-                first_furthest_dist = dist_map[node]
-
-        dist_map = self.generate_bfs_distance_map(first_furthest_node)
-        second_furthest_node, second_furthest_dist = None, 0
-        for node in sorted(dist_map.keys()):
-            if dist_map[node] > second_furthest_dist:
-                second_furthest_node = node
-                second_furthest_dist = dist_map[node]
+        first_furthest_node = self.get_furthest_node(self.get_distance_array(random_cell.pos))
+        second_furthest_node = self.get_furthest_node(self.get_distance_array(first_furthest_node))
         return first_furthest_node, second_furthest_node
 
+    @staticmethod
+    def get_furthest_node(distances: np.ndarray) -> Tuple[int, int]:
+        """ The first node in row major order with the largest distance """
+        row, col = np.unravel_index(int(np.argmax(distances)), distances.shape)
+        return int(row), int(col)
+
     def determine_nodes_with_greatest_separation_on_border(self):
-        dist_map = self.generate_bfs_distance_map((0, 0))
+        dist_map = self.get_distance_array((0, 0))
         first_furthest_node, first_furthest_dist = None, 0
 
         for node in self.get_border_nodes():
@@ -382,7 +655,7 @@ class MazeGrid(object):
                 first_furthest_node = node
                 first_furthest_dist = dist_map[node]
 
-        dist_map = self.generate_bfs_distance_map(first_furthest_node)
+        dist_map = self.get_distance_array(first_furthest_node)
         second_furthest_node, second_furthest_dist = None, 0
         for node in self.get_border_nodes():
             if dist_map[node] > second_furthest_dist:
@@ -413,28 +686,89 @@ class MazeGrid(object):
             for col in self.each_col():
                 yield self[row, col]
 
+    def yield_each_enabled_cell(self):
+        for pos in self.enabled_index:
+            yield self[pos]
+
     @staticmethod
-    def create_gif_from_frames(frames: List[Image.Image], file_name: str):
-        frames[0].save(file_name, format='gif', save_all=True, append_images=frames[1:], duration=100, loop=0)
+    def create_gif_from_frames(frames: Iterable[Image.Image], file_name: str):
+        GifSink(file_name).consume(frames)
 
-    def apply_algorithm(self, video_output_path: str) -> Optional[cv2.VideoWriter]:
+    def generate_steps(self) -> Iterator[None]:
+        """ Carves the maze lazily, yielding once after every passage that gets carved """
         raise NotImplementedError
 
+    def generate(self):
+        """ Carves the whole maze without rendering anything """
+        for _ in self.generate_steps():
+            pass
+
+    def get_step_count(self) -> int:
+        """ Number of steps generate_steps is expected to take, one per passage of a perfect maze """
+        return max(self.enabled_size - 1, 0)
+
+    def iterate_frames(self, stride: int=None, frames: int=None) -> Iterator[Union[Image.Image, HoldFrame]]:
+        """ Lazily yields the starting maze, a frame every stride carving steps and the finished maze.
+        :param stride: Defaults to frame_stride
+        :param frames: Fit the generation into exactly this many frames instead, see FrameScheduler. Defaults to
+        animation_frames when no stride is given.
+        """
+        if frames is None and stride is None:
+            frames = self.animation_frames
+        if frames is not None:
+            yield from FrameScheduler.iterate(self.generate_steps(), self.get_step_count(), frames,
+                                              self.create_animation_frame)
+            return
+        stride = stride or self.frame_stride
+        yield self.create_animation_frame()
+        steps_since_last_frame = 0
+        for _ in self.generate_steps():
+            steps_since_last_frame += 1
+            if steps_since_last_frame == stride:
+                yield self.create_animation_frame()
+                steps_since_last_frame = 0
+        if steps_since_last_frame:
+            yield self.create_animation_frame()
+
+    def apply_algorithm(self, video_output_path: str=None, background_encoding: bool=True, frames: int=None,
+                        duration: float=None,
+                        fps: int=FrameScheduler.default_fps) -> Union[List[Image.Image], FrameSink]:
+        """ Carves the maze, rendering the frames of iterate_frames
+        :param video_output_path: Stream the frames into a video instead of returning them
+        :param background_encoding: Encode the video on a separate thread, see BackgroundSink
+        :param frames: Frames of the animation, defaults to animation_frames
+        :param duration: Length of the animation in seconds at fps, used when frames is not given
+        :return: The frames, held frames repeated, or the sink when they went to a video
+        """
+        frame_iterator = self.iterate_frames(frames=FrameScheduler.get_frame_count(frames, duration, fps))
+        if video_output_path:
+            sink = VideoSink(video_output_path, fps)
+            if background_encoding:
+                sink = BackgroundSink(sink)
+            sink.consume(frame_iterator)
+            return sink
+        frame_list = []
+        for frame in frame_iterator:
+            if isinstance(frame, HoldFrame):
+                frame_list.extend([frame_list[-1]] * frame.count)
+            else:
+                frame_list.append(frame)
+        return frame_list
+
     def number_of_dead_ends(self):
-        count = 0
-        for cell in self.yield_each_cell():
-            if cell.get_links().__len__() == 1:
-                count += 1
-        return count
+        if self.array_backed:
+            return int((get_degree_array(self.get_passage_array()) == 1).sum())
+        # Counting the links of the cells is cheaper than building the passage array
+        return sum(1 for row in self.grid for cell in row if len(cell.links) == 1)
+
+    def get_stats(self) -> MazeStats:
+        """ Diameter, dead ends, branching and corridor metrics of the maze, see analytics.analyze_passages """
+        return analyze_passages(self.get_passage_array(), self.get_enabled_array())
 
     @staticmethod
     def get_video_writer(starting_frame: Image, output_file_path):
-        video_dims = starting_frame.size
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        video_writer = cv2.VideoWriter(output_file_path, fourcc, 15, video_dims)
-        return video_writer
+        return VideoSink.create_writer(starting_frame.size, output_file_path)
 
     @staticmethod
     def write_frame_to_video_writer(writer: cv2.VideoWriter, frame: Image):
-        frame_as_np = np.array(frame)
-        writer.write(cv2.cvtColor(frame_as_np, cv2.COLOR_RGB2BGR))
+        VideoSink.write_to_writer(writer, frame)
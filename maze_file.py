@@ -0,0 +1,131 @@
+import struct
+import numpy as np
+from typing import Iterable, Optional, Tuple
+from maze_fun.maze import MazeGrid
+from maze_fun.array_grid import SOUTH, EAST, passages_from_south_east
+
+# One byte per cell holding these bits
+CELL_SOUTH, CELL_EAST, CELL_ENABLED = 1, 2, 4
+
+MAGIC = b'MAZE'
+VERSION = 1
+# magic, version, rows, cols, seed, has_seed, algorithm
+HEADER_FORMAT = '<4sHIIqB32s'
+HEADER_SIZE = 64
+
+
+def pack_header(rows: int, cols: int, algorithm: str, seed: Optional[int]) -> bytes:
+    header = struct.pack(HEADER_FORMAT, MAGIC, VERSION, rows, cols, seed or 0, seed is not None,
+                         algorithm.encode('ascii'))
+    return header.ljust(HEADER_SIZE, b'\0')
+
+
+class MazeFile(object):
+    """ A maze stored as a fixed size header followed by one byte per cell in row major order. A cell only
+    stores whether it opens to the south and east and whether it is enabled; its north and west passages are
+    the south and east bits of its neighbors. The cells are memory mapped, so opening a file costs nothing and
+    a query only reads the pages it touches.
+    """
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            header = f.read(struct.calcsize(HEADER_FORMAT))
+        magic, version, rows, cols, seed, has_seed, algorithm = struct.unpack(HEADER_FORMAT, header)
+        if magic != MAGIC:
+            raise Exception('{0} is not a maze file'.format(path))
+        if version != VERSION:
+            raise Exception('Unsupported maze file version {0}'.format(version))
+        self.path = path
+        self.rows = rows
+        self.cols = cols
+        self.seed = seed if has_seed else None
+        self.algorithm = algorithm.rstrip(b'\0').decode('ascii')
+        self.cells = np.memmap(path, dtype=np.uint8, mode='r', offset=HEADER_SIZE, shape=(rows, cols))
+
+    @staticmethod
+    def write(maze: MazeGrid, path: str, algorithm: str='', seed: Optional[int]=None, chunk_rows: int=4096):
+        passages = maze.get_passage_array()
+        enabled = maze.get_enabled_array()
+        with open(path, 'wb') as f:
+            f.write(pack_header(maze.rows, maze.cols, algorithm, seed))
+            for first_row in range(0, maze.rows, chunk_rows):
+                rows = slice(first_row, first_row + chunk_rows)
+                cells = ((passages[rows] & SOUTH) != 0) * np.uint8(CELL_SOUTH)
+                cells |= ((passages[rows] & EAST) != 0) * np.uint8(CELL_EAST)
+                cells |= enabled[rows] * np.uint8(CELL_ENABLED)
+                f.write(cells.astype(np.uint8).tobytes())
+
+    def is_enabled(self, row: int, col: int) -> bool:
+        return bool(self.cells[row, col] & CELL_ENABLED)
+
+    def is_linked(self, first: Tuple[int, int], second: Tuple[int, int]) -> bool:
+        (row, col), (other_row, other_col) = sorted([first, second])
+        if other_row == row + 1 and other_col == col:
+            return bool(self.cells[row, col] & CELL_SOUTH)
+        if other_row == row and other_col == col + 1:
+            return bool(self.cells[row, col] & CELL_EAST)
+        return False
+
+    def get_passage_array(self, first_row: int=0, last_row: int=None) -> np.ndarray:
+        """ N/S/E/W passage bitmask (see array_grid) of rows first_row up to last_row, reading only those rows
+        and the one above them.
+        """
+        last_row = self.rows if last_row is None else last_row
+        top = max(first_row - 1, 0)
+        cells = np.asarray(self.cells[top:last_row])
+        passages = passages_from_south_east(cells & CELL_SOUTH, cells & CELL_EAST)
+        return passages[first_row - top:]
+
+    def get_enabled_array(self) -> np.ndarray:
+        return (np.asarray(self.cells) & CELL_ENABLED) != 0
+
+    def to_maze(self, maze_class=MazeGrid) -> MazeGrid:
+        maze = maze_class(self.rows, self.cols, array_backed=True)
+        maze.load_passage_array(self.get_passage_array())
+        maze.set_enabled_mask(self.get_enabled_array())
+        return maze
+
+
+class MazeFileWriter(object):
+    """ Writes a maze file one row at a time from the (east, north) rows of a stream_rows generator, so a maze of
+    any height is written with O(cols) memory. A row's south bits are the north links of the row below it, so
+    one row is held back until the next one arrives. The row count is filled into the header on close.
+    """
+    def __init__(self, path: str, cols: int, algorithm: str='', seed: Optional[int]=None):
+        self.path = path
+        self.cols = cols
+        self.algorithm = algorithm
+        self.seed = seed
+        self.rows = 0
+        self.pending = None  # type: Optional[np.ndarray]
+        self.file = open(path, 'wb')
+        self.file.write(pack_header(0, cols, algorithm, seed))
+
+    def write_row(self, east: np.ndarray, north: np.ndarray, enabled: Optional[np.ndarray]=None):
+        if self.pending is not None:
+            self.pending |= north * np.uint8(CELL_SOUTH)
+            self.file.write(self.pending.tobytes())
+        cells = east * np.uint8(CELL_EAST)
+        cells |= (True if enabled is None else enabled) * np.uint8(CELL_ENABLED)
+        self.pending = cells.astype(np.uint8)
+        self.rows += 1
+
+    def close(self):
+        if self.file.closed:
+            return
+        if self.pending is not None:
+            self.file.write(self.pending.tobytes())
+            self.pending = None
+        self.file.seek(0)
+        self.file.write(pack_header(self.rows, self.cols, self.algorithm, self.seed))
+        self.file.close()
+
+    def consume(self, rows: Iterable[Tuple[np.ndarray, np.ndarray]]) -> int:
+        """ Writes every row and closes the file
+        :return: The number of rows written
+        """
+        try:
+            for east, north in rows:
+                self.write_row(east, north)
+        finally:
+            self.close()
+        return self.rows
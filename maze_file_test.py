@@ -0,0 +1,61 @@
+import os
+import random
+import tempfile
+import numpy as np
+from piyush_utils.base_test_case import BaseTestCase
+from maze_fun.binary_tree import BinaryTree
+from maze_fun.eller import Eller
+from maze_fun.maze_file import MazeFile, MazeFileWriter
+from maze_fun.recursive_backtracker import RecursiveBackTracker
+from maze_fun.side_winder import SideWinder
+
+
+class MazeFileTest(BaseTestCase):
+    def write_and_open(self, maze, directory: str, **kwargs) -> MazeFile:
+        file_path = os.path.join(directory, 'maze.bin')
+        MazeFile.write(maze, file_path, **kwargs)
+        return MazeFile(file_path)
+
+    def test_round_trip(self):
+        random.seed(0)
+        maze = SideWinder(6, 9)
+        maze.generate()
+        with tempfile.TemporaryDirectory() as directory:
+            maze_file = self.write_and_open(maze, directory, algorithm='side_winder', seed=0, chunk_rows=4)
+            self.assertEqual((maze_file.rows, maze_file.cols), (6, 9))
+            self.assertEqual(maze_file.algorithm, 'side_winder')
+            self.assertEqual(maze_file.seed, 0)
+            self.assertEqual(maze_file.to_maze().create_maze_string(), maze.create_maze_string())
+            self.assertEqual(maze_file.is_linked((2, 3), (2, 4)), maze[2, 3].is_linked(maze[2, 4]))
+            self.assertEqual(maze_file.is_linked((3, 3), (2, 3)), maze[3, 3].is_linked(maze[2, 3]))
+            self.assertTrue((maze_file.get_passage_array(2, 4) == maze.get_passage_array()[2:4]).all())
+
+    def test_round_trip_with_mask(self):
+        random.seed(1)
+        maze = RecursiveBackTracker(5, 5, array_backed=True)
+        for node in [(0, 0), (2, 2), (4, 1)]:
+            maze.disable_cell(*node)
+        maze.generate()
+        with tempfile.TemporaryDirectory() as directory:
+            maze_file = self.write_and_open(maze, directory)
+            self.assertIsNone(maze_file.seed)
+            self.assertFalse(maze_file.is_enabled(2, 2))
+            loaded = maze_file.to_maze()
+            self.assertEqual(loaded.enabled_size, 22)
+            self.assertEqual(loaded.create_maze_string(), maze.create_maze_string())
+
+    def test_streamed_rows(self):
+        for maze_class in [BinaryTree, SideWinder, Eller]:
+            with tempfile.TemporaryDirectory() as directory:
+                file_path = os.path.join(directory, 'maze.bin')
+                writer = MazeFileWriter(file_path, 7, algorithm=maze_class.__name__, seed=3)
+                self.assertEqual(writer.consume(maze_class.stream_rows(7, rows=9, seed=3)), 9)
+                maze_file = MazeFile(file_path)
+                self.assertEqual((maze_file.rows, maze_file.cols), (9, 7))
+                expected = maze_class(9, 7, array_backed=True)
+                expected.load_passage_rows(maze_class.stream_rows(7, rows=9, seed=3))
+                self.assertTrue((maze_file.get_passage_array() == expected.get_passage_array()).all())
+                loaded = maze_file.to_maze()
+                self.assertEqual(int((loaded.generate_bfs_distance_array([(0, 0)])[0] >= 0).sum()), 63)
+                # A spanning tree of 63 cells has 62 passages, each stored on both of its cells
+                self.assertEqual(int(np.unpackbits(loaded.get_passage_array()).sum()), 2 * 62)
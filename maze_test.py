@@ -1,12 +1,25 @@
+import gzip
+import io
 import os
 import random
+import re
+import tempfile
+import numpy as np
+from PIL import Image
 from unittest import skip
 from piyush_utils.base_test_case import BaseTestCase
 from maze_fun.maze import MazeGrid, Cell
+from maze_fun.array_grid import NORTH, SOUTH
+from maze_fun.bfs import BFSEngine
 from maze_fun.side_winder import SideWinder
 from maze_fun.binary_tree import BinaryTree
+from maze_fun.eller import Eller
 from maze_fun.hunt_and_kill import HuntAndKill
+from maze_fun.wilson import Wilson
+from maze_fun.aldous_border import AldousBorder
 from maze_fun.recursive_backtracker import RecursiveBackTracker
+from maze_fun.frame_sinks import BackgroundSink, FrameSink, PngSequenceSink
+from maze_fun.tile_renderer import TileRenderer
 
 
 class MazeTest(BaseTestCase):
@@ -156,3 +169,337 @@ class MazeTest(BaseTestCase):
         correct_output_file = self.get_maze_test_res('mask-sample.txt')
         print(test_string)
         self.assert_file_content_equal_to_string(test_string, correct_output_file)
+
+    def test_vectorized_binary_tree(self):
+        for array_backed in [False, True]:
+            maze = BinaryTree(6, 7, array_backed=array_backed)
+            maze.apply_vectorized_algorithm(seed=3)
+            self.assertEqual(len(maze.generate_bfs_distance_map((0, 0))), maze.size())
+            self.assertEqual(sum(len(cell.get_links()) for cell in maze.yield_each_cell()), 2 * (maze.size() - 1))
+            for col in range(maze.cols - 1):
+                self.assertTrue(maze[0, col].is_linked(maze[0, col + 1]))
+            for row in range(1, maze.rows):
+                self.assertTrue(maze[row, maze.cols - 1].is_linked(maze[row - 1, maze.cols - 1]))
+
+    def test_passage_array_round_trip(self):
+        maze = self.create_side_winder_maze()
+        array_maze = MazeGrid(4, 4, array_backed=True)
+        array_maze.load_passage_array(maze.get_passage_array())
+        self.assertEqual(maze.create_maze_string(), array_maze.create_maze_string())
+        self.assertEqual(maze.number_of_dead_ends(), array_maze.number_of_dead_ends())
+        array_maze.get_passage_array()[0, 0] = 0
+
+    def test_passage_array_cache(self):
+        maze = MazeGrid(3, 3)
+        passages = maze.get_passage_array()
+        self.assertIs(maze.get_passage_array(), passages)
+        self.assertFalse(passages.flags.writeable)
+        maze.link_cells(maze[1, 1], maze[2, 1])
+        self.assertEqual(passages[1, 1], 0)
+        self.assertEqual(maze.get_passage_array()[1, 1], SOUTH)
+        self.assertEqual(maze.get_passage_array()[2, 1], NORTH)
+        self.assertEqual(maze.number_of_dead_ends(), 2)
+
+    def test_vectorized_side_winder_seed_compatible(self):
+        maze = self.create_side_winder_maze()
+        random.seed(0)
+        compatible_maze = SideWinder(4, 4, array_backed=True)
+        compatible_maze.apply_vectorized_algorithm(seed_compatible=True)
+        self.assertEqual(maze.create_maze_string(), compatible_maze.create_maze_string())
+
+    def test_vectorized_side_winder(self):
+        for chunk_rows in [1, 3, 100]:
+            maze = SideWinder(7, 6, array_backed=True)
+            maze.apply_vectorized_algorithm(seed=5, chunk_rows=chunk_rows)
+            self.assertEqual(len(maze.generate_bfs_distance_map((0, 0))), maze.size())
+            self.assertEqual(sum(len(cell.get_links()) for cell in maze.yield_each_cell()), 2 * (maze.size() - 1))
+            for col in range(maze.cols - 1):
+                self.assertTrue(maze[0, col].is_linked(maze[0, col + 1]))
+
+    def test_streamed_rows_match_vectorized(self):
+        vectorized = SideWinder(9, 7, array_backed=True)
+        vectorized.apply_vectorized_algorithm(seed=5, chunk_rows=4)
+        for chunk_rows in [1, 3, 100]:
+            streamed = SideWinder(9, 7, array_backed=True)
+            streamed.load_passage_rows(SideWinder.stream_rows(7, rows=9, seed=5, chunk_rows=chunk_rows))
+            self.assertTrue((streamed.get_passage_array() == vectorized.get_passage_array()).all())
+        vectorized = BinaryTree(9, 70, array_backed=True)
+        vectorized.apply_vectorized_algorithm(seed=5)
+        streamed = BinaryTree(9, 70, array_backed=True)
+        streamed.load_passage_rows(BinaryTree.stream_rows(70, rows=9, seed=5))
+        self.assertTrue((streamed.get_passage_array() == vectorized.get_passage_array()).all())
+
+    def test_enabled_cell_index(self):
+        maze = MazeGrid(3, 3)
+        maze.disable_cell(0, 0)
+        maze.disable_cell(1, 1)
+        maze.enable_cell(0, 0)
+        maze.disable_cell(2, 2)
+        self.assertEqual(maze.enabled_size, 7)
+        enabled = {(0, 0), (0, 1), (0, 2), (1, 0), (1, 2), (2, 0), (2, 1)}
+        self.assertEqual({cell.pos for cell in maze.yield_each_enabled_cell()}, enabled)
+        self.assertNotIn((1, 1), maze.enabled_index)
+        random.seed(0)
+        for _ in range(50):
+            self.assertIn(maze.get_random_cell().pos, enabled)
+
+    def test_generate_bfs_distance_array(self):
+        maze = self.create_side_winder_maze()
+        distances, _ = maze.generate_bfs_distance_array([(3, 0)])
+        for node, dist in maze.generate_bfs_distance_map((3, 0)).items():
+            self.assertEqual(distances[node], dist)
+
+        distances, _ = maze.generate_bfs_distance_array([(3, 0), (0, 3)])
+        self.assertEqual(distances[3, 0], 0)
+        self.assertEqual(distances[0, 3], 0)
+        self.assertEqual(distances[0, 0], 3)
+
+        distances, _ = maze.generate_bfs_distance_array([(3, 0)], max_radius=2)
+        self.assertEqual(distances[1, 0], 2)
+        self.assertEqual(distances[1, 1], -1)
+
+    def test_bfs_path_with_early_stop(self):
+        maze = self.create_side_winder_maze()
+        engine = maze.get_bfs_engine()
+        distances, parents = engine.search([(3, 0)], target=(1, 1), with_parents=True)
+        self.assertEqual(engine.path_to(parents, (1, 1)), [(3, 0), (2, 0), (1, 0), (1, 1)])
+        self.assertEqual(distances[3, 3], -1)
+        with self.assertRaises(Exception):
+            engine.path_to(parents, (3, 3))
+
+    def test_bfs_vectorized_search(self):
+        random.seed(4)
+        maze = RecursiveBackTracker(12, 9, array_backed=True)
+        maze.generate()
+        # Cut the maze between rows 5 and 6 so the bottom half is unreachable
+        passages = maze.get_passage_array().copy()
+        passages[5] &= ~np.uint8(SOUTH)
+        passages[6] &= ~np.uint8(NORTH)
+        engine = BFSEngine(passages)
+        for kwargs in [{}, {'max_radius': 7}, {'target': (4, 8)}, {'target': (11, 8)}]:
+            scalar = engine.search([(0, 0), (5, 5)], with_parents=True, **kwargs)
+            levels = engine.search([(0, 0), (5, 5)], with_parents=True, vectorized=True, **kwargs)
+            reached = scalar[0] >= 0
+            if 'target' not in kwargs:
+                # Both finish the last level, the early stop of the scalar search may leave part of it unvisited
+                self.assertTrue(np.array_equal(scalar[0], levels[0]))
+            self.assertTrue(np.array_equal(scalar[0][reached], levels[0][reached]))
+            self.assertEqual((scalar[1] == -2).sum(), (~reached).sum())
+
+    def test_animation_frames_match_full_render(self):
+        for array_backed in [False, True]:
+            random.seed(2)
+            maze = HuntAndKill(5, 6, array_backed=array_backed)
+            frames = maze.apply_algorithm()
+            self.assertEqual(frames[-1].tobytes(), maze.create_maze_image().tobytes())
+
+        random.seed(2)
+        maze = RecursiveBackTracker(6, 6)
+        for node in [(0, 0), (2, 3), (3, 3), (5, 5)]:
+            maze.disable_cell(*node)
+        maze.create_animation_frame()
+        maze.apply_algorithm()
+        self.assertEqual(maze.create_animation_frame().tobytes(), maze.create_maze_image().tobytes())
+
+    def test_iterate_frames_with_stride(self):
+        random.seed(0)
+        maze = SideWinder(4, 4)
+        frames = list(maze.iterate_frames(stride=4))
+        # 15 carving steps give the starting frame, 3 strided frames and the finished maze
+        self.assertEqual(len(frames), 5)
+        self.assertEqual(frames[-1].tobytes(), maze.create_maze_image().tobytes())
+
+    def test_stream_frames_to_gif(self):
+        random.seed(0)
+        maze = BinaryTree(3, 3)
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, 'maze.gif')
+            maze.create_gif_from_frames(maze.iterate_frames(), file_path)
+            gif = Image.open(file_path)
+            self.assertEqual(gif.n_frames, 9)
+            self.assertEqual(gif.size, maze.create_maze_image().size)
+
+            png_directory = os.path.join(directory, 'frames')
+            maze = BinaryTree(3, 3)
+            maze.create_maze_path_frames(png_directory, stride=2)
+            path = maze.get_stripped_dist_map_between_two_nodes(*maze.determine_nodes_with_greatest_separation())
+            self.assertEqual(len(os.listdir(png_directory)), 5 + 1 + len(path) + 15)
+
+    def test_background_sink(self):
+        random.seed(0)
+        maze = SideWinder(4, 4)
+        with tempfile.TemporaryDirectory() as directory:
+            sink = BackgroundSink(PngSequenceSink(directory), max_queue_size=2)
+            self.assertEqual(sink.consume(maze.iterate_frames()), 16)
+            self.assertEqual(len(os.listdir(directory)), 16)
+            stats = sink.get_stats()
+            self.assertEqual(stats['frames_encoded'], 16)
+            self.assertEqual(stats['queue_depth'], 0)
+            self.assertLessEqual(stats['max_queue_depth'], 2)
+
+    def test_background_sink_error(self):
+        class FailingSink(FrameSink):
+            def write(self, frame):
+                raise ValueError('Could not encode')
+
+        sink = BackgroundSink(FailingSink(), max_queue_size=1)
+        with self.assertRaises(ValueError):
+            sink.consume(MazeGrid(2, 2).create_maze_image() for _ in range(5))
+
+    def test_distance_cache(self):
+        for array_backed in [False, True]:
+            random.seed(0)
+            maze = RecursiveBackTracker(8, 8, array_backed=array_backed)
+            maze.generate()
+            # 63 links
+            self.assertEqual(maze.version, 63)
+            start, end = maze.determine_nodes_with_greatest_separation()
+            path = maze.get_stripped_dist_map_between_two_nodes(start, end)
+            self.assertEqual(sorted(path, key=path.get), maze.find_path(start, end))
+            maze.create_maze_string_with_distance(start)
+            # Only the BFS from the random cell and the one from start ran
+            self.assertEqual(maze.distance_cache.get_stats(), {'hits': 2, 'misses': 2, 'size': 2})
+
+            cell = maze[start]
+            cell.unlink_two_cells(list(cell.get_links())[0])
+            maze.disable_cell(*end)
+            self.assertEqual(maze.version, 65)
+            distances = maze.get_distance_array(start)
+            self.assertEqual(maze.distance_cache.misses, 3)
+            self.assertEqual(distances[end], -1)
+            self.assertFalse(distances.flags.writeable)
+
+    def test_streamed_rendering(self):
+        random.seed(2)
+        maze = RecursiveBackTracker(7, 9, array_backed=True)
+        maze.disable_cell(3, 3)
+        maze.generate()
+        text = io.StringIO()
+        maze.write_maze_string(text, maze.generate_bfs_distance_array([(0, 0)])[0])
+        self.assertEqual(text.getvalue(), maze.create_maze_string_with_distance((0, 0)))
+        with tempfile.TemporaryDirectory() as directory:
+            png_path = os.path.join(directory, 'maze.png')
+            raw_path = os.path.join(directory, 'maze.npy')
+            for place_on_background in [True, False]:
+                expected = maze.create_maze_image(place_on_background=place_on_background).tobytes()
+                for strip_rows in [1, 3, 20]:
+                    maze.write_maze_png(png_path, place_on_background, strip_rows)
+                    self.assertEqual(Image.open(png_path).convert('RGB').tobytes(), expected)
+                    image = maze.create_maze_image_memmap(raw_path, place_on_background, strip_rows)
+                    self.assertEqual(image.tobytes(), expected)
+                    del image
+            maze.default_cell_size = 10
+            maze.write_maze_png(png_path, False, 3)
+            self.assertEqual(Image.open(png_path).convert('RGB').tobytes(),
+                             maze.create_maze_image(place_on_background=False).tobytes())
+
+    def test_svg_export(self):
+        random.seed(3)
+        maze = RecursiveBackTracker(6, 7)
+        maze.disable_cell(2, 2)
+        maze.generate()
+        expected = maze.get_set_of_all_possible_line_segments()
+        for cell in maze.yield_each_enabled_cell():
+            for link in cell.get_links():
+                row, col = max(cell.pos, link.pos)
+                expected.discard((col, row, col + 1, row) if link.col_num == cell.col_num else (col, row, col, row + 1))
+        with tempfile.TemporaryDirectory() as directory:
+            for file_name in ['maze.svg', 'maze.svgz']:
+                file_path = os.path.join(directory, file_name)
+                maze.save_maze_svg(file_path)
+                opener = gzip.open if file_name.endswith('z') else open
+                with opener(file_path, 'rt') as f:
+                    svg = f.read()
+                path_data = re.search(r' d="([^"]*)"', svg).group(1)
+                segments = set()
+                runs = [(int(x), int(y), line, int(length))
+                        for x, y, line, length in re.findall(r'M(\d+) (\d+)([hv])(\d+)', path_data)]
+                run_starts = {(x, y, line) for x, y, line, _ in runs}
+                for x, y, line, length in runs:
+                    # Runs are maximal, no other run starts where one ends
+                    end = (x + length, y, line) if line == 'h' else (x, y + length, line)
+                    self.assertNotIn(end, run_starts)
+                    for i in range(length):
+                        if line == 'h':
+                            segments.add((x + i, y, x + i + 1, y))
+                        else:
+                            segments.add((x, y + i, x, y + i + 1))
+                self.assertEqual(segments, expected)
+
+    def test_tile_renderer_matches_segment_renderer(self):
+        for array_backed in [False, True]:
+            for rows, cols in [(1, 1), (4, 4), (5, 7)]:
+                random.seed(rows)
+                maze = RecursiveBackTracker(rows, cols, array_backed=array_backed)
+                if rows > 1:
+                    maze.disable_cell(0, 0)
+                    maze.disable_cell(rows - 1, cols - 2)
+                maze.generate()
+                end = (rows - 1, cols - 1)
+                self.assertEqual(maze.create_maze_image(None, (0, 1 % cols), end).tobytes(),
+                                 maze.create_maze_image_from_segments(None, (0, 1 % cols), end).tobytes())
+                # Small cells included, create_maze_image only composites tiles up to TileRenderer.max_cell_size
+                for cell_size, wall_width in [(6, 5), (10, 5), (10, 4), (12, 1), (20, 8), (64, 5), (100, 5)]:
+                    maze.default_cell_size = cell_size
+                    maze.maze_wall_width = wall_width
+                    renderer = TileRenderer(cell_size, wall_width)
+                    tiled = renderer.render(maze.get_wall_array(), maze.get_base_image_size(), maze.fill_white,
+                                            maze.fill_black)
+                    segments = maze.create_maze_image_from_segments(place_on_background=False)
+                    self.assertEqual(tiled.tobytes(), segments.tobytes())
+                    self.assertEqual(maze.create_maze_image(place_on_background=False).tobytes(), segments.tobytes())
+
+    def assert_perfect_maze(self, maze: MazeGrid):
+        """ Every enabled cell is reachable and there are no loops """
+        distances, _ = maze.generate_bfs_distance_array([maze.get_random_cell().pos])
+        self.assertEqual(int((distances >= 0).sum()), maze.enabled_size)
+        links = sum(len(cell.get_links()) for cell in maze.yield_each_cell())
+        self.assertEqual(links, 2 * (maze.enabled_size - 1))
+
+    def test_wilson(self):
+        random.seed(4)
+        maze = Wilson(5, 6)
+        maze.disable_cell(2, 2)
+        frames = maze.apply_algorithm()
+        self.assertEqual(len(frames), 1 + 28)
+        self.assert_perfect_maze(maze)
+
+    def test_wilson_fast_algorithm(self):
+        for store_exit_directions in [True, False]:
+            maze = Wilson(12, 9, array_backed=True)
+            maze.disable_cell(0, 0)
+            maze.disable_cell(5, 5)
+            maze.apply_fast_algorithm(seed=7, store_exit_directions=store_exit_directions)
+            self.assert_perfect_maze(maze)
+            self.assertEqual(maze.get_passage_array()[5, 5], 0)
+
+    def test_eller(self):
+        random.seed(5)
+        maze = Eller(6, 8)
+        maze.generate()
+        self.assert_perfect_maze(maze)
+        for cols in [1, 2, 15]:
+            maze = Eller(11, cols, array_backed=True)
+            maze.apply_vectorized_algorithm(seed=cols)
+            self.assert_perfect_maze(maze)
+
+    def test_hunt_and_kill_on_masked_grid(self):
+        random.seed(3)
+        maze = HuntAndKill(8, 8)
+        for row in range(2, 6):
+            maze.disable_cell(row, 4)
+        maze.generate()
+        self.assert_perfect_maze(maze)
+        for row in range(2, 6):
+            self.assertEqual(len(maze[row, 4].get_links()), 0)
+
+    def test_aldous_broder_wilson_hybrid(self):
+        random.seed(6)
+        maze = AldousBorder(9, 7, array_backed=True)
+        maze.disable_cell(4, 3)
+        phase_steps = maze.apply_hybrid_algorithm(switch_fraction=0.3)
+        self.assert_perfect_maze(maze)
+        self.assertGreater(phase_steps['aldous_broder'], 0)
+        self.assertGreater(phase_steps['wilson'], 0)
+        self.assertIsNone(maze.switch_fraction)
+        self.assertIsNone(AldousBorder(2, 2).phase_steps)
@@ -0,0 +1,156 @@
+import heapq
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from maze_fun.array_grid import NORTH, SOUTH, EAST, WEST
+
+
+class PathSolver(object):
+    """ Finds the path between two cells of a passage bitmask (see array_grid) while only touching the cells
+    the search actually reaches. Visited cells live in dicts keyed by flat index instead of arrays the size of
+    the maze, so a search between two close cells costs nothing no matter how large the maze is.
+    nodes_expanded counts the cells whose passages were followed, over every search of this solver.
+    """
+    methods = ('bidirectional', 'astar')
+
+    def __init__(self, passages: np.ndarray):
+        self.rows, self.cols = passages.shape
+        self.flat_passages = passages.ravel()
+        self.offsets = ((NORTH, -self.cols), (SOUTH, self.cols), (EAST, 1), (WEST, -1))
+        self.nodes_expanded = 0
+
+    def flat_index(self, node: Tuple[int, int]) -> int:
+        return node[0] * self.cols + node[1]
+
+    def get_neighbors(self, index: int) -> List[int]:
+        self.nodes_expanded += 1
+        passages = int(self.flat_passages[index])
+        return [index + offset for direction, offset in self.offsets if passages & direction]
+
+    def find_path(self, start: Tuple[int, int], goal: Tuple[int, int],
+                  method: str='bidirectional') -> List[Tuple[int, int]]:
+        """
+        :param method: 'bidirectional' for a breadth first search from both ends that stops where they meet,
+        'astar' for A* guided by the Manhattan distance to the goal
+        :return: The shortest path from start to goal, both included
+        """
+        if method == 'bidirectional':
+            path = self.bidirectional_search(self.flat_index(start), self.flat_index(goal))
+        elif method == 'astar':
+            path = self.astar_search(self.flat_index(start), self.flat_index(goal))
+        else:
+            raise Exception('Unknown method {0}, expected one of {1}'.format(method, self.methods))
+        if path is None:
+            raise Exception('There is no path from {0} to {1}'.format(start, goal))
+        return [divmod(index, self.cols) for index in path]
+
+    def bidirectional_search(self, start: int, goal: int) -> Optional[List[int]]:
+        """ Grows the smaller of the two frontiers one whole level at a time. Finishing the level in which the
+        frontiers first touch and keeping the shortest meeting keeps the path shortest on mazes with loops too.
+        """
+        if start == goal:
+            return [start]
+        parents = ({start: -1}, {goal: -1})  # type: Tuple[Dict[int, int], Dict[int, int]]
+        depths = ({start: 0}, {goal: 0})  # type: Tuple[Dict[int, int], Dict[int, int]]
+        frontiers = ([start], [goal])
+        while frontiers[0] and frontiers[1]:
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            own_parents, own_depths = parents[side], depths[side]
+            other_depths = depths[1 - side]
+            best = None
+            next_frontier = []
+            for index in frontiers[side]:
+                depth = own_depths[index] + 1
+                for neighbor in self.get_neighbors(index):
+                    if neighbor in own_parents:
+                        continue
+                    own_parents[neighbor] = index
+                    own_depths[neighbor] = depth
+                    next_frontier.append(neighbor)
+                    if neighbor in other_depths:
+                        length = depth + other_depths[neighbor]
+                        if best is None or length < best[0]:
+                            best = (length, neighbor)
+            if best is not None:
+                meeting = best[1]
+                forward = self.trace(parents[0], meeting)
+                backward = self.trace(parents[1], meeting)
+                return forward[::-1] + backward[1:]
+            frontiers = (next_frontier, frontiers[1]) if side == 0 else (frontiers[0], next_frontier)
+        return None
+
+    def astar_search(self, start: int, goal: int) -> Optional[List[int]]:
+        goal_row, goal_col = divmod(goal, self.cols)
+
+        def heuristic(index: int) -> int:
+            row, col = divmod(index, self.cols)
+            return abs(row - goal_row) + abs(col - goal_col)
+
+        parents = {start: -1}  # type: Dict[int, int]
+        costs = {start: 0}  # type: Dict[int, int]
+        # Ties on the estimate go to the node closest to the goal
+        heap = [(heuristic(start), heuristic(start), start)]
+        closed = set()
+        while heap:
+            _, _, index = heapq.heappop(heap)
+            if index == goal:
+                return self.trace(parents, goal)[::-1]
+            if index in closed:
+                continue
+            closed.add(index)
+            cost = costs[index] + 1
+            for neighbor in self.get_neighbors(index):
+                if neighbor in costs and costs[neighbor] <= cost:
+                    continue
+                costs[neighbor] = cost
+                parents[neighbor] = index
+                estimate = heuristic(neighbor)
+                heapq.heappush(heap, (cost + estimate, estimate, neighbor))
+        return None
+
+    def descend(self, distances: np.ndarray, node: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """ Follows the distances of a BFS from node back to its source, always stepping to a linked neighbor one
+        closer. Costs one step per node of the path instead of a search.
+        :return: The path from node to the source, both included
+        """
+        flat_distances = distances.ravel()
+        index = self.flat_index(node)
+        if flat_distances[index] < 0:
+            raise Exception('{0} was not reached by the search'.format(node))
+        path = [index]
+        while flat_distances[index] > 0:
+            closer = flat_distances[index] - 1
+            index = next(neighbor for neighbor in self.get_neighbors(index) if flat_distances[neighbor] == closer)
+            path.append(index)
+        return [divmod(index, self.cols) for index in path]
+
+    @staticmethod
+    def trace(parents: Dict[int, int], index: int) -> List[int]:
+        """ :return: The nodes from index back to the start of the search that produced parents """
+        path = [index]
+        while parents[index] >= 0:
+            index = parents[index]
+            path.append(index)
+        return path
+
+
+class CellPathSolver(PathSolver):
+    """ PathSolver that follows the links of a grid of Cells instead of a passage bitmask, so nothing has to be
+    built for the whole maze before a search.
+    """
+    def __init__(self, grid: List[List]):
+        """
+        :param grid: Rows of the Cells of a maze that isn't array backed
+        """
+        self.rows, self.cols = len(grid), len(grid[0])
+        self.flat_cells = [cell for row in grid for cell in row]
+        self.link_offsets = (-self.cols, self.cols, 1, -1)
+        self.nodes_expanded = 0
+
+    def get_neighbors(self, index: int) -> List[int]:
+        self.nodes_expanded += 1
+        cols = self.cols
+        linked = [other.row_num * cols + other.col_num for other in self.flat_cells[index].links]
+        if len(linked) < 2:
+            return linked
+        # Same N/S/E/W order as the passage bitmask, so both solvers break ties alike
+        return [index + offset for offset in self.link_offsets if index + offset in linked]
@@ -0,0 +1,71 @@
+import numpy as np
+from piyush_utils.base_test_case import BaseTestCase
+from maze_fun.bfs import BFSEngine
+from maze_fun.maze import MazeGrid
+from maze_fun.path_solver import CellPathSolver, PathSolver
+from maze_fun.wilson import Wilson
+
+
+class PathSolverTest(BaseTestCase):
+    def test_shortest_path_matches_bfs(self):
+        rng = np.random.default_rng(0)
+        for seed in range(20):
+            maze = Wilson(8, 11, array_backed=True)
+            maze.apply_fast_algorithm(seed=seed)
+            passages = maze.get_passage_array().copy()
+            # Open a few extra walls so there is more than one way between some cells
+            for _ in range(10):
+                row, col = int(rng.integers(7)), int(rng.integers(11))
+                passages[row, col] |= 2
+                passages[row + 1, col] |= 1
+            start = (int(rng.integers(8)), int(rng.integers(11)))
+            goal = (int(rng.integers(8)), int(rng.integers(11)))
+            distances, _ = BFSEngine(passages).search([start])
+            for method in PathSolver.methods:
+                path = PathSolver(passages).find_path(start, goal, method)
+                self.assertEqual((path[0], path[-1]), (start, goal))
+                self.assertEqual(len(path) - 1, distances[goal])
+                for (row, col), (other_row, other_col) in zip(path, path[1:]):
+                    self.assertEqual(abs(row - other_row) + abs(col - other_col), 1)
+
+    def test_stops_early(self):
+        maze = Wilson(60, 60, array_backed=True)
+        maze.apply_fast_algorithm(seed=1)
+        goal = maze.find_path((30, 30), (30, 31), 'astar')[1]
+        for method in PathSolver.methods:
+            solver = maze.get_path_solver()
+            self.assertEqual(solver.find_path((30, 30), goal, method), [(30, 30), goal])
+            self.assertLess(solver.nodes_expanded, 10)
+        self.assertEqual(maze.find_path((4, 4), (4, 4)), [(4, 4)])
+
+    def test_cell_grid(self):
+        array_maze = Wilson(200, 200, array_backed=True)
+        array_maze.apply_fast_algorithm(seed=2)
+        passages = array_maze.get_passage_array().copy()
+        passages[10, 10:12] |= np.uint8(2)
+        passages[11, 10:12] |= np.uint8(1)
+        array_maze.load_passage_array(passages)
+        maze = Wilson(200, 200)
+        maze.load_passage_array(passages)
+        goal = array_maze.find_path((100, 100), (100, 101))[1]
+        scans = []
+        maze.yield_each_cell = lambda: scans.append(1) or MazeGrid.yield_each_cell(maze)
+        solver = maze.get_path_solver()
+        self.assertIsInstance(solver, CellPathSolver)
+        self.assertEqual(solver.find_path((100, 100), goal), [(100, 100), goal])
+        self.assertLess(solver.nodes_expanded, 10)
+        self.assertEqual(len(maze.get_stripped_dist_map_between_two_nodes((100, 100), goal)), 2)
+        # Neither query went over every cell to build the passage array
+        self.assertEqual(scans, [])
+        for method in PathSolver.methods:
+            self.assertEqual(maze.find_path((5, 5), (150, 20), method),
+                             array_maze.find_path((5, 5), (150, 20), method))
+            self.assertEqual(maze.find_path((9, 9), (12, 12), method), array_maze.find_path((9, 9), (12, 12), method))
+
+    def test_no_path(self):
+        passages = np.zeros((2, 2), dtype=np.uint8)
+        for method in PathSolver.methods:
+            with self.assertRaises(Exception):
+                PathSolver(passages).find_path((0, 0), (1, 1), method)
+        with self.assertRaises(Exception):
+            PathSolver(passages).find_path((0, 0), (1, 1), 'dfs')
@@ -2,35 +2,25 @@ from maze_fun.maze import MazeGrid
 
 
 class RecursiveBackTracker(MazeGrid):
+    # Four seconds of video at the default frame rate, whatever the size of the maze
+    animation_frames = 60
 
-    def apply_algorithm(self, video_output_path: str=None):
-        video_writer = None
-        if video_output_path:
-            starting_image = self.create_maze_image()
-            video_writer = self.get_video_writer(starting_image, video_output_path)
-            self.write_frame_to_video_writer(video_writer, starting_image)
+    def generate_steps(self):
         cell = self.get_random_cell()
         stack = [cell]
         need_to_vist = self.enabled_size - 1
-        num_of_frames_left = 6
 
         while need_to_vist > 0:
-            rand_neighbor = cell.get_random_unlinked_neighbor()
+            rand_neighbor = cell.get_random_unlinked_neighbor(self.rng)
             if rand_neighbor:
-                cell.link_two_cells(rand_neighbor)
+                self.link_cells(cell, rand_neighbor)
                 cell = rand_neighbor
                 stack.append(cell)
                 need_to_vist -= 1
-                if video_writer and num_of_frames_left == 0:
-                    frame = self.create_maze_image()
-                    self.write_frame_to_video_writer(video_writer, frame)
-                    num_of_frames_left = 6
-                else:
-                    num_of_frames_left -= 1
+                yield
             else:
                 stack.pop(-1)
                 cell = stack[-1] # set it to the last
-        return video_writer
 
 
 if __name__ == '__main__':
@@ -1,11 +1,14 @@
-from PIL import Image
-from random import choice
+import random
+import numpy as np
+from typing import Iterator, Optional, Tuple
 from maze_fun.maze import MazeGrid
+from maze_fun.array_grid import passages_from_south_east
 
 
 class SideWinder(MazeGrid):
-    def apply_algorithm(self) -> Image :
-        frames = [self.create_maze_image()]
+    respects_disabled_cells = False
+
+    def generate_steps(self):
         for row in self.each_row():
             stack = []
             at_north_boundary = row == 0
@@ -21,18 +24,113 @@ class SideWinder(MazeGrid):
                 elif not at_north_boundary and coin_flip == 'heads':
                     should_close_out = True
                 if should_close_out:
-                    random_cell = choice(stack)
+                    random_cell = self.rng.choice(stack)
                     if random_cell.north:
-                        random_cell.link_two_cells(random_cell.north)
-                        frames.append(self.create_maze_image())
+                        self.link_cells(random_cell, random_cell.north)
+                        yield
                     stack.clear()
                 else:
-                    cell.link_two_cells(cell.right)
-                    frames.append(self.create_maze_image())
-        return frames
+                    self.link_cells(cell, cell.right)
+                    yield
+
+    def apply_vectorized_algorithm(self, seed=None, chunk_rows: int=1024, seed_compatible: bool=False):
+        """ Carves the maze a chunk of rows at a time with numpy instead of one coin flip and link per cell.
+        :param seed: int seed or numpy Generator. With seed_compatible it is the seed of a random.Random instead,
+        and None means the rng of the maze.
+        :param chunk_rows: Number of rows generated per batch of array operations
+        :param seed_compatible: Consume random numbers exactly like apply_algorithm so the same seed gives the
+        same maze. This mode walks the cells one by one and is only meant for reproducing old mazes.
+        """
+        if seed_compatible:
+            passages = self.generate_seed_compatible_passages(self.rows, self.cols, seed, self.rng)
+        else:
+            passages = self.generate_passages(self.rows, self.cols, np.random.default_rng(seed), chunk_rows)
+        self.load_passage_array(passages)
+
+    @classmethod
+    def generate_passages(cls, rows: int, cols: int, rng: np.random.Generator, chunk_rows: int=1024) -> np.ndarray:
+        south = np.zeros((rows, cols), dtype=bool)
+        east = np.zeros((rows, cols), dtype=bool)
+        for first_row in range(0, rows, chunk_rows):
+            last_row = min(first_row + chunk_rows, rows)
+            chunk_east, chunk_north = cls.generate_rows(first_row, last_row - first_row, cols, rng)
+            east[first_row:last_row] = chunk_east
+            # Carving north from a row opens the south side of the row above it
+            if first_row == 0:
+                south[0:last_row - 1] = chunk_north[1:]
+            else:
+                south[first_row - 1:last_row - 1] = chunk_north
+        return passages_from_south_east(south, east)
+
+    @classmethod
+    def stream_rows(cls, cols: int, rows: Optional[int]=None, seed=None,
+                    chunk_rows: int=64) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """ Generates the maze one row at a time in O(chunk_rows * cols) memory, see MazeFileWriter.
+        :param rows: Number of rows, None keeps generating rows for as long as they are consumed
+        :param seed: int seed or numpy Generator
+        :return: Iterator of (east, north) bool arrays, marking the cells linked to their right and upper neighbor
+        """
+        rng = np.random.default_rng(seed)
+        first_row = 0
+        while rows is None or first_row < rows:
+            num_rows = chunk_rows if rows is None else min(chunk_rows, rows - first_row)
+            east, north = cls.generate_rows(first_row, num_rows, cols, rng)
+            for row in range(num_rows):
+                yield east[row], north[row]
+            first_row += num_rows
+
+    @staticmethod
+    def generate_rows(first_row: int, num_rows: int, cols: int,
+                      rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+        """ Generates the east and north links of num_rows consecutive rows.
+        A run of cells closes wherever the coin flip says so (and always on the east border). Each run then
+        carves north out of one of its cells, which is picked for every run at once over the flattened rows.
+        Every cell takes one 64 bit word from the bit generator: its top bit is the coin flip and its low 53 bits
+        pick the cell of the run that ends there. Rows consume a fixed share of the stream this way, so the maze
+        doesn't depend on how the rows are split into chunks.
+        :return: (east, north) bool arrays of shape (num_rows, cols)
+        """
+        words = rng.bit_generator.random_raw(num_rows * cols)
+        close_out = (words >> np.uint64(63)).astype(bool).reshape(num_rows, cols)
+        if first_row == 0:
+            close_out[0] = False
+        close_out[:, -1] = True
+
+        run_ends = np.flatnonzero(close_out)
+        run_starts = np.empty_like(run_ends)
+        run_starts[0] = 0
+        run_starts[1:] = run_ends[:-1] + 1
+        fractions = (words[run_ends] & np.uint64(2 ** 53 - 1)) * 2.0 ** -53
+        picks = run_starts + (fractions * (run_ends - run_starts + 1)).astype(np.int64)
+
+        north = np.zeros(num_rows * cols, dtype=bool)
+        north[picks] = True
+        north = north.reshape(num_rows, cols)
+        if first_row == 0:
+            north[0] = False
+        return ~close_out, north
+
+    @staticmethod
+    def generate_seed_compatible_passages(rows: int, cols: int, seed=None, rng=random) -> np.ndarray:
+        """ :param rng: Drawn from when there is no seed """
+        rand = random.Random(seed) if seed is not None else rng
+        south = np.zeros((rows, cols), dtype=bool)
+        east = np.zeros((rows, cols), dtype=bool)
+        for row in range(rows):
+            run_start = 0
+            for col in range(cols):
+                coin_flip = rand.choice(['heads', 'tails'])
+                if col == cols - 1 or (row != 0 and coin_flip == 'heads'):
+                    # Same draw as choice(stack) over the cells of the current run
+                    picked_col = run_start + rand.choice(range(col - run_start + 1))
+                    if row != 0:
+                        south[row - 1, picked_col] = True
+                    run_start = col + 1
+                else:
+                    east[row, col] = True
+        return passages_from_south_east(south, east)
 
 
 if __name__ == '__main__':
     grid = SideWinder(10, 10)
-    frames = grid.create_maze_path_frames()
-    MazeGrid.create_gif_from_frames(frames, 'output.gif')
+    grid.create_maze_path_frames('output.gif')
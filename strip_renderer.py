@@ -0,0 +1,100 @@
+import struct
+import zlib
+import numpy as np
+from typing import BinaryIO, Iterator, Tuple
+from maze_fun.tile_renderer import TileRenderer
+
+
+class PngStreamWriter(object):
+    """ Writes a two color PNG one band of pixel rows at a time. Pixels are stored as 1 bit palette indices and
+    every band is compressed into its own IDAT chunk, so nothing but the compressor state outlives a band.
+    """
+    def __init__(self, f: BinaryIO, width: int, height: int, fill_white: Tuple[int, int, int],
+                 fill_black: Tuple[int, int, int]):
+        self.f = f
+        self.width = width
+        self.height = height
+        self.rows_written = 0
+        self.compressor = zlib.compressobj()
+        f.write(b'\x89PNG\r\n\x1a\n')
+        # width, height, bit depth, color type 3 (palette), compression, filter, interlace
+        self.write_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 1, 3, 0, 0, 0))
+        self.write_chunk(b'PLTE', bytes(fill_white) + bytes(fill_black))
+
+    def write_chunk(self, chunk_type: bytes, data: bytes):
+        self.f.write(struct.pack('>I', len(data)))
+        self.f.write(chunk_type)
+        self.f.write(data)
+        self.f.write(struct.pack('>I', zlib.crc32(chunk_type + data) & 0xffffffff))
+
+    def write_rows(self, mask: np.ndarray):
+        """
+        :param mask: bool array of shape (rows, width), True for pixels in fill_black
+        """
+        num_rows = mask.shape[0]
+        scanlines = np.zeros((num_rows, 1 + (self.width + 7) // 8), dtype=np.uint8)
+        # The first byte of every scanline selects filter type 0 (none)
+        scanlines[:, 1:] = np.packbits(mask, axis=1)
+        data = self.compressor.compress(scanlines.tobytes())
+        if data:
+            self.write_chunk(b'IDAT', data)
+        self.rows_written += num_rows
+
+    def close(self):
+        if self.rows_written != self.height:
+            raise Exception('Wrote {0} of {1} rows'.format(self.rows_written, self.height))
+        self.write_chunk(b'IDAT', self.compressor.flush())
+        self.write_chunk(b'IEND', b'')
+
+
+class StripRenderer(object):
+    """ Renders the walls of a maze (see TileRenderer) in horizontal strips of strip_rows cell rows, so the
+    memory used stays bounded by one strip no matter how large the image is.
+    """
+    def __init__(self, walls: np.ndarray, cell_size: int, wall_width: int, strip_rows: int=8, border: int=0):
+        """
+        :param walls: (rows, cols) array with the N/S/E/W bits of the walls each cell draws
+        :param border: Width of the white frame around the maze, like MazeGrid.place_maze_on_background
+        """
+        self.walls = walls
+        self.tile_renderer = TileRenderer(cell_size, wall_width)
+        self.strip_height = strip_rows * cell_size
+        self.border = border
+        rows, cols = walls.shape
+        self.maze_size = (cell_size * cols + wall_width, cell_size * rows + wall_width)
+        self.image_size = (self.maze_size[0] + 2 * border, self.maze_size[1] + 2 * border)
+
+    def iterate_strips(self) -> Iterator[np.ndarray]:
+        """ Yields bool arrays of shape (strip height, width) covering the image from top to bottom """
+        width, height = self.image_size
+        maze_width, maze_height = self.maze_size
+        border = self.border
+        for top in range(0, height, self.strip_height):
+            bottom = min(top + self.strip_height, height)
+            strip = np.zeros((bottom - top, width), dtype=bool)
+            maze_top, maze_bottom = max(top - border, 0), min(bottom - border, maze_height)
+            if maze_top < maze_bottom:
+                mask = self.tile_renderer.render_wall_mask_strip(self.walls, self.maze_size, maze_top, maze_bottom)
+                strip_top = maze_top + border - top
+                strip[strip_top:strip_top + len(mask), border:border + maze_width] = mask
+            yield strip
+
+    def write_png(self, f: BinaryIO, fill_white: Tuple[int, int, int], fill_black: Tuple[int, int, int]):
+        width, height = self.image_size
+        writer = PngStreamWriter(f, width, height, fill_white, fill_black)
+        for strip in self.iterate_strips():
+            writer.write_rows(strip)
+        writer.close()
+
+    def write_memmap(self, output_path: str, fill_white: Tuple[int, int, int],
+                     fill_black: Tuple[int, int, int]) -> np.memmap:
+        """ Renders into a memory mapped .npy file of shape (height, width, 3) holding the RGB pixels """
+        width, height = self.image_size
+        image = np.lib.format.open_memmap(output_path, mode='w+', dtype=np.uint8, shape=(height, width, 3))
+        colors = np.array([fill_white, fill_black], dtype=np.uint8)
+        top = 0
+        for strip in self.iterate_strips():
+            image[top:top + len(strip)] = colors[strip.view(np.uint8)]
+            top += len(strip)
+        image.flush()
+        return image
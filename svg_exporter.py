@@ -0,0 +1,85 @@
+import gzip
+import numpy as np
+from typing import Iterator, TextIO, Tuple
+from maze_fun.tile_renderer import TileRenderer
+
+
+def get_runs(lines: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ Finds the maximal runs of True along the rows of a bool array
+    :return: (rows, starts, lengths) arrays with one entry per run, in row major order
+    """
+    padded = np.zeros((lines.shape[0], lines.shape[1] + 2), dtype=np.int8)
+    padded[:, 1:-1] = lines
+    steps = np.diff(padded, axis=1)
+    rows, starts = np.nonzero(steps == 1)
+    _, ends = np.nonzero(steps == -1)
+    return rows, starts, ends - starts
+
+
+class SvgExporter(object):
+    """ Writes the walls of a maze as a single SVG path. Collinear walls that touch are merged into one line, so
+    the output grows with the number of straight wall runs rather than with the number of cells. Coordinates are
+    in cells, the viewBox scales them to cell_size pixels.
+    """
+    def __init__(self, walls: np.ndarray, cell_size: int, wall_width: int, fill_white: Tuple[int, int, int],
+                 fill_black: Tuple[int, int, int], border: int=0):
+        """
+        :param walls: (rows, cols) array with the N/S/E/W bits of the walls each cell draws
+        :param border: Width in pixels of the white frame around the maze
+        """
+        self.walls = walls
+        self.cell_size = cell_size
+        self.wall_width = wall_width
+        self.fill_white = fill_white
+        self.fill_black = fill_black
+        self.border = border
+
+    @staticmethod
+    def get_color(color: Tuple[int, int, int]) -> str:
+        return '#{0:02x}{1:02x}{2:02x}'.format(*color)
+
+    def get_header(self) -> str:
+        rows, cols = self.walls.shape
+        # Leave room for half a wall around the outer walls
+        margin = (self.border + self.wall_width / 2) / self.cell_size
+        width = self.cell_size * cols + self.wall_width + 2 * self.border
+        height = self.cell_size * rows + self.wall_width + 2 * self.border
+        return ('<svg xmlns="http://www.w3.org/2000/svg" width="{0}" height="{1}" viewBox="{2:g} {2:g} {3:g} {4:g}">'
+                '<rect x="{2:g}" y="{2:g}" width="{3:g}" height="{4:g}" fill="{5}"/>'
+                '<path fill="none" stroke="{6}" stroke-width="{7:g}" stroke-linecap="square" d="'
+                ).format(width, height, -margin, cols + 2 * margin, rows + 2 * margin,
+                         self.get_color(self.fill_white), self.get_color(self.fill_black),
+                         self.wall_width / self.cell_size)
+
+    def iterate_path_data(self, runs_per_chunk: int=4096) -> Iterator[str]:
+        """ Yields the path data a chunk of wall runs at a time, as absolute moves followed by a relative line """
+        horizontal, vertical = TileRenderer.get_wall_lines(self.walls)
+        rows, starts, lengths = get_runs(horizontal)
+        for first in range(0, len(rows), runs_per_chunk):
+            chunk = slice(first, first + runs_per_chunk)
+            yield ''.join('M{0} {1}h{2}'.format(x, y, length) for y, x, length in
+                          zip(rows[chunk].tolist(), starts[chunk].tolist(), lengths[chunk].tolist()))
+        cols, starts, lengths = get_runs(vertical.T)
+        for first in range(0, len(cols), runs_per_chunk):
+            chunk = slice(first, first + runs_per_chunk)
+            yield ''.join('M{0} {1}v{2}'.format(x, y, length) for x, y, length in
+                          zip(cols[chunk].tolist(), starts[chunk].tolist(), lengths[chunk].tolist()))
+
+    def write(self, f: TextIO):
+        f.write(self.get_header())
+        for data in self.iterate_path_data():
+            f.write(data)
+        f.write('"/></svg>\n')
+
+    def save(self, output_path: str, compress: bool=None):
+        """
+        :param compress: gzip the output, by default only when the path ends in .svgz or .gz
+        """
+        if compress is None:
+            compress = output_path.endswith(('.svgz', '.gz'))
+        if compress:
+            with gzip.open(output_path, 'wt', encoding='ascii') as f:
+                self.write(f)
+        else:
+            with open(output_path, 'w', encoding='ascii') as f:
+                self.write(f)
@@ -0,0 +1,156 @@
+import numpy as np
+from PIL import Image, ImageDraw
+from typing import Dict, Tuple
+from maze_fun.array_grid import NORTH, SOUTH, EAST, WEST
+
+# Bits of a corner configuration: which of the four walls meeting at a grid corner are drawn
+LEFT_ARM, RIGHT_ARM, UP_ARM, DOWN_ARM = 1, 2, 4, 8
+
+
+class TileRenderer(object):
+    """ Rasterizes the walls of a maze by compositing pre-rendered tiles instead of drawing one line per wall.
+    The image is cut into cell sized tiles centered (up to a small margin) on the corners of the grid. The only
+    walls that reach into such a tile are the four that meet at its corner, so there are 16 possible tiles.
+    Each one holds exactly the pixels ImageDraw.line would draw for its walls, which makes the output pixel for
+    pixel the same as drawing every wall as a line, and the whole image is a single fancy index of the tiles.
+    """
+    tile_cache = {}  # type: Dict[Tuple[int, int], np.ndarray]
+    # Above this the tiles are so large that copying them costs more than drawing the walls as lines
+    max_cell_size = 64
+
+    def __init__(self, cell_size: int, wall_width: int):
+        self.cell_size = cell_size
+        self.wall_width = wall_width
+        self.margin = self.get_margin(wall_width)
+        if self.margin + wall_width // 2 >= cell_size:
+            raise Exception('Walls of width {0} are too wide for cells of size {1}'.format(wall_width, cell_size))
+        self.tiles = self.get_tiles(cell_size, wall_width)
+
+    @classmethod
+    def suits(cls, cell_size: int, wall_width: int) -> bool:
+        """ :return: Whether the walls fit in tiles of this size and compositing them beats drawing lines """
+        return cls.get_margin(wall_width) + wall_width // 2 < cell_size <= cls.max_cell_size
+
+    @staticmethod
+    def get_margin(wall_width: int) -> int:
+        """ Distance between the top left of a tile and its grid corner. A wall drawn through the corner covers
+        (wall_width - 1) // 2 pixels before it and wall_width // 2 after it, which the tile has to hold.
+        """
+        return wall_width // 2 + 1
+
+    @classmethod
+    def get_tiles(cls, cell_size: int, wall_width: int) -> np.ndarray:
+        """
+        :return: bool array of shape (16, cell_size, cell_size) where tiles[config] is True for the black pixels
+        around a corner with that configuration. The corner sits at (margin, margin) of the tile.
+        """
+        key = (cell_size, wall_width)
+        if key not in cls.tile_cache:
+            margin = cls.get_margin(wall_width)
+            # The arms are drawn around a corner in the middle of a 3x3 cell canvas, then the tile is cut out
+            corner = cell_size
+            arms = {
+                LEFT_ARM: (corner - cell_size, corner, corner, corner),
+                RIGHT_ARM: (corner, corner, corner + cell_size, corner),
+                UP_ARM: (corner, corner - cell_size, corner, corner),
+                DOWN_ARM: (corner, corner, corner, corner + cell_size),
+            }
+            arm_masks = {}
+            for arm, coords in arms.items():
+                image = Image.new('L', (3 * cell_size, 3 * cell_size), color=0)
+                ImageDraw.Draw(image).line(coords, width=wall_width, fill=255)
+                top_left = corner - margin
+                arm_masks[arm] = np.array(image)[top_left:top_left + cell_size, top_left:top_left + cell_size] > 0
+            tiles = np.zeros((16, cell_size, cell_size), dtype=bool)
+            for config in range(16):
+                for arm, mask in arm_masks.items():
+                    if config & arm:
+                        tiles[config] |= mask
+            cls.tile_cache[key] = tiles
+        return cls.tile_cache[key]
+
+    @staticmethod
+    def get_wall_lines(walls: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        :param walls: (rows, cols) array with the N/S/E/W bits of the walls each cell draws
+        :return: (horizontal, vertical) bool arrays. horizontal[i, j] of shape (rows + 1, cols) is the wall between
+        corners (i, j) and (i, j + 1), vertical[i, j] of shape (rows, cols + 1) the wall between (i, j) and (i + 1, j).
+        """
+        rows, cols = walls.shape
+        horizontal = np.zeros((rows + 1, cols), dtype=bool)
+        horizontal[:-1] |= (walls & NORTH) != 0
+        horizontal[1:] |= (walls & SOUTH) != 0
+        vertical = np.zeros((rows, cols + 1), dtype=bool)
+        vertical[:, :-1] |= (walls & WEST) != 0
+        vertical[:, 1:] |= (walls & EAST) != 0
+        return horizontal, vertical
+
+    @staticmethod
+    def get_corner_configs(walls: np.ndarray) -> np.ndarray:
+        """
+        :param walls: (rows, cols) array with the N/S/E/W bits of the walls each cell draws
+        :return: (rows + 1, cols + 1) array with the configuration of every grid corner
+        """
+        rows, cols = walls.shape
+        wall_rows, wall_cols = TileRenderer.get_wall_lines(walls)
+        # horizontal[i, j + 1] is the wall between corners (i, j) and (i, j + 1), padded by one on both sides
+        horizontal = np.zeros((rows + 1, cols + 2), dtype=np.uint8)
+        horizontal[:, 1:-1] = wall_rows
+        # vertical[i + 1, j] is the wall between corners (i, j) and (i + 1, j)
+        vertical = np.zeros((rows + 2, cols + 1), dtype=np.uint8)
+        vertical[1:-1] = wall_cols
+
+        configs = horizontal[:, :-1] * np.uint8(LEFT_ARM)
+        configs |= horizontal[:, 1:] * np.uint8(RIGHT_ARM)
+        configs |= vertical[:-1] * np.uint8(UP_ARM)
+        configs |= vertical[1:] * np.uint8(DOWN_ARM)
+        return configs
+
+    def render_wall_mask(self, walls: np.ndarray, image_size: Tuple[int, int]) -> np.ndarray:
+        """
+        :param walls: (rows, cols) array with the N/S/E/W bits of the walls each cell draws
+        :param image_size: (width, height) of the output
+        :return: bool array of shape (height, width), True where a wall is drawn
+        """
+        configs = self.get_corner_configs(walls)
+        num_rows, num_cols = configs.shape
+        cell_size, margin = self.cell_size, self.margin
+        mask = self.tiles[configs].transpose(0, 2, 1, 3).reshape(num_rows * cell_size, num_cols * cell_size)
+        width, height = image_size
+        return self.pad(mask[margin:margin + height, margin:margin + width], height, width)
+
+    def render_wall_mask_strip(self, walls: np.ndarray, image_size: Tuple[int, int], top: int,
+                               bottom: int) -> np.ndarray:
+        """ Same as render_wall_mask(walls, image_size)[top:bottom], but only touches the corners and tiles that
+        reach into those pixel rows.
+        :return: bool array of shape (bottom - top, width)
+        """
+        cell_size, margin = self.cell_size, self.margin
+        first_corner = (top + margin) // cell_size
+        last_corner = (bottom - 1 + margin) // cell_size + 1
+        # A corner row depends on the cell rows above and below it
+        first_cell = max(first_corner - 1, 0)
+        configs = self.get_corner_configs(walls[first_cell:min(last_corner, walls.shape[0])])
+        configs = configs[first_corner - first_cell:last_corner - first_cell]
+        num_rows, num_cols = configs.shape
+        mask = self.tiles[configs].transpose(0, 2, 1, 3).reshape(num_rows * cell_size, num_cols * cell_size)
+        offset = top + margin - first_corner * cell_size
+        width, _ = image_size
+        return self.pad(mask[offset:offset + bottom - top, margin:margin + width], bottom - top, width)
+
+    @staticmethod
+    def pad(mask: np.ndarray, height: int, width: int) -> np.ndarray:
+        """ The image reaches wall_width pixels past the last grid line, which can be further than the last tile
+        goes when the cells are small. Nothing is drawn out there.
+        """
+        if mask.shape == (height, width):
+            return mask
+        return np.pad(mask, ((0, height - mask.shape[0]), (0, width - mask.shape[1])))
+
+    def render(self, walls: np.ndarray, image_size: Tuple[int, int], fill_white: Tuple[int, int, int],
+               fill_black: Tuple[int, int, int]) -> Image:
+        wall_mask = self.render_wall_mask(walls, image_size)
+        # A two color palette image lets PIL expand the mask to RGB in C
+        image = Image.frombytes('P', image_size, np.ascontiguousarray(wall_mask).view(np.uint8).tobytes())
+        image.putpalette(list(fill_white) + list(fill_black))
+        return image.convert('RGB')
@@ -0,0 +1,149 @@
+import random
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+from maze_fun.array_grid import NORTH, SOUTH, EAST, WEST
+
+
+def label_components(enabled: np.ndarray) -> Tuple[np.ndarray, int]:
+    """ Labels the groups of enabled cells that are connected through their enabled neighbors, with one flood
+    fill over the whole grid that never visits a cell twice.
+    :return: (labels, count) where labels is 0..count-1 for enabled cells, in row major order of their first
+    cell, and -1 for disabled cells
+    """
+    rows, cols = enabled.shape
+    flat_enabled = enabled.ravel().tolist()
+    labels = [-1] * (rows * cols)
+    count = 0
+    for start in np.flatnonzero(enabled).tolist():
+        if labels[start] >= 0:
+            continue
+        labels[start] = count
+        stack = [start]
+        while stack:
+            index = stack.pop()
+            row, col = divmod(index, cols)
+            for neighbor, inside in ((index - cols, row > 0), (index + cols, row < rows - 1),
+                                     (index - 1, col > 0), (index + 1, col < cols - 1)):
+                if inside and flat_enabled[neighbor] and labels[neighbor] < 0:
+                    labels[neighbor] = count
+                    stack.append(neighbor)
+        count += 1
+    return np.array(labels, dtype=np.int64).reshape(rows, cols), count
+
+
+def generate_tile(maze_class, enabled: np.ndarray, seed: int) -> Tuple[np.ndarray, np.ndarray, int]:
+    """ Carves a tile with maze_class, once for every connected group of enabled cells in it, since a generator
+    only reaches the cells connected to the one it starts from. All groups are carved in the same grid with only
+    the cells of the current group enabled, single cells have nothing to carve.
+    :return: (passages, labels, count) of the tile, see label_components for labels and count
+    """
+    rows, cols = enabled.shape
+    labels, count = label_components(enabled)
+    maze = maze_class(rows, cols, array_backed=True)
+    maze.rng = random.Random(seed)
+    maze.set_enabled_mask(np.zeros((rows, cols), dtype=bool))
+    flat_labels = labels.ravel()
+    order = np.argsort(flat_labels, kind='stable')
+    bounds = np.searchsorted(flat_labels[order], np.arange(count + 1)).tolist()
+    for label in range(count):
+        cells = [divmod(index, cols) for index in order[bounds[label]:bounds[label + 1]].tolist()]
+        if len(cells) < 2:
+            continue
+        for row, col in cells:
+            maze.enable_cell(row, col)
+        maze.generate()
+        for row, col in cells:
+            maze.disable_cell(row, col)
+    return maze.get_passage_array(), labels, count
+
+
+class TiledGenerator(object):
+    """ Generates one large maze as a grid of independently carved tiles, spread over a process pool.
+    Every tile is a perfect maze of its own (or one per connected group of its enabled cells), and the tiles
+    are joined by opening one seam passage per edge of a random spanning tree over those groups. The result is
+    a perfect maze of every connected group of enabled cells of the whole grid.
+    Smaller tiles parallelize better, but the seams between them show as long straight walls.
+    """
+    def __init__(self, maze_class, tile_rows: int=64, tile_cols: Optional[int]=None, workers: int=1):
+        """
+        :param maze_class: Any MazeGrid generator. The ones that ignore disabled cells (see
+        MazeGrid.respects_disabled_cells) only take grids without any.
+        """
+        self.maze_class = maze_class
+        self.tile_rows = tile_rows
+        self.tile_cols = tile_cols or tile_rows
+        self.workers = workers
+
+    def get_tile_slices(self, rows: int, cols: int) -> List[Tuple[slice, slice]]:
+        return [(slice(row, row + self.tile_rows), slice(col, col + self.tile_cols))
+                for row in range(0, rows, self.tile_rows) for col in range(0, cols, self.tile_cols)]
+
+    def generate_passages(self, enabled: np.ndarray, seed: Optional[int]=None) -> np.ndarray:
+        """
+        :param enabled: (rows, cols) bool mask of the enabled cells
+        :param seed: Base seed, every tile gets its own seed derived from it and its index
+        :return: N/S/E/W passage bitmask (see array_grid)
+        """
+        if not self.maze_class.respects_disabled_cells and not enabled.all():
+            raise Exception('{0} ignores disabled cells and would carve through them'.format(
+                self.maze_class.__name__))
+        seed = random.getrandbits(64) if seed is None else seed
+        tiles = self.get_tile_slices(*enabled.shape)
+        seeds = [int(np.random.SeedSequence([seed, index]).generate_state(1)[0]) for index in range(len(tiles))]
+        tile_masks = [enabled[tile] for tile in tiles]
+        if self.workers <= 1:
+            results = list(map(generate_tile, [self.maze_class] * len(tiles), tile_masks, seeds))
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                results = list(executor.map(generate_tile, [self.maze_class] * len(tiles), tile_masks, seeds))
+
+        passages = np.zeros(enabled.shape, dtype=np.uint8)
+        labels = np.full(enabled.shape, -1, dtype=np.int64)
+        num_labels = 0
+        for tile, (tile_passages, tile_labels, count) in zip(tiles, results):
+            passages[tile] = tile_passages
+            labels[tile] = np.where(tile_labels >= 0, tile_labels + num_labels, -1)
+            num_labels += count
+        self.stitch(passages, labels, num_labels, np.random.default_rng(seed))
+        return passages
+
+    def stitch(self, passages: np.ndarray, labels: np.ndarray, num_labels: int, rng: np.random.Generator):
+        """ Opens seams between tiles in a random order, skipping any seam between two groups that are already
+        joined (Kruskal's algorithm), so exactly enough seams are opened to connect every group it can.
+        """
+        candidates = []
+        for col in range(self.tile_cols, labels.shape[1], self.tile_cols):
+            seam_rows = np.flatnonzero((labels[:, col - 1] >= 0) & (labels[:, col] >= 0))
+            candidates.append(np.stack([seam_rows, np.full_like(seam_rows, col - 1), np.full_like(seam_rows, 0)]))
+        for row in range(self.tile_rows, labels.shape[0], self.tile_rows):
+            seam_cols = np.flatnonzero((labels[row - 1] >= 0) & (labels[row] >= 0))
+            candidates.append(np.stack([np.full_like(seam_cols, row - 1), seam_cols, np.full_like(seam_cols, 1)]))
+        if not candidates:
+            return
+        # Every candidate is (row, col, vertical) for the seam to the east or south of that cell
+        candidates = np.concatenate(candidates, axis=1).T
+        candidates = candidates[rng.permutation(len(candidates))]
+
+        parent = list(range(num_labels))
+
+        def find(label: int) -> int:
+            while parent[label] != label:
+                parent[label] = parent[parent[label]]
+                label = parent[label]
+            return label
+
+        rows, cols, vertical = candidates.T
+        first_labels = labels[rows, cols].tolist()
+        second_labels = labels[rows + vertical, cols + 1 - vertical].tolist()
+        for i, (row, col, is_vertical) in enumerate(candidates.tolist()):
+            first, second = find(first_labels[i]), find(second_labels[i])
+            if first == second:
+                continue
+            parent[second] = first
+            if is_vertical:
+                passages[row, col] |= SOUTH
+                passages[row + 1, col] |= NORTH
+            else:
+                passages[row, col] |= EAST
+                passages[row, col + 1] |= WEST
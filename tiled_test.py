@@ -0,0 +1,77 @@
+import random
+import numpy as np
+from piyush_utils.base_test_case import BaseTestCase
+from maze_fun.aldous_border import AldousBorder
+from maze_fun.bfs import BFSEngine
+from maze_fun.binary_tree import BinaryTree
+from maze_fun.eller import Eller
+from maze_fun.hunt_and_kill import HuntAndKill
+from maze_fun.recursive_backtracker import RecursiveBackTracker
+from maze_fun.side_winder import SideWinder
+from maze_fun.tiled import TiledGenerator, label_components
+from maze_fun.wilson import Wilson
+
+
+class TiledGeneratorTest(BaseTestCase):
+    def assert_perfect_per_component(self, passages: np.ndarray, enabled: np.ndarray):
+        labels, count = label_components(enabled)
+        # Each connected group of n cells is a tree with n - 1 passages, each stored on both of its cells
+        self.assertEqual(int(np.unpackbits(passages).sum()), 2 * (int(enabled.sum()) - count))
+        self.assertFalse((passages[~enabled]).any())
+        distances_reached = 0
+        engine = BFSEngine(passages)
+        for label in range(count):
+            row, col = np.argwhere(labels == label)[0]
+            distances, _ = engine.search([(int(row), int(col))])
+            self.assertTrue(((distances >= 0) == (labels == label)).all())
+            distances_reached += int((distances >= 0).sum())
+        self.assertEqual(distances_reached, int(enabled.sum()))
+
+    def test_every_generator(self):
+        enabled = np.ones((13, 17), dtype=bool)
+        for maze_class in [RecursiveBackTracker, Wilson, HuntAndKill, AldousBorder]:
+            passages = TiledGenerator(maze_class, tile_rows=4, tile_cols=5).generate_passages(enabled, seed=1)
+            self.assert_perfect_per_component(passages, enabled)
+
+    def test_mask(self):
+        enabled = np.ones((13, 17), dtype=bool)
+        # A wall of disabled cells splits the grid in two and a broken row splits some tiles into pieces
+        enabled[:, 8] = False
+        enabled[6, np.arange(17) % 3 != 0] = False
+        enabled[2, 2] = False
+        self.assertEqual(label_components(enabled)[1], 2)
+        for maze_class in [RecursiveBackTracker, Wilson, AldousBorder]:
+            passages = TiledGenerator(maze_class, tile_rows=4).generate_passages(enabled, seed=3)
+            self.assert_perfect_per_component(passages, enabled)
+
+    def test_generators_ignoring_the_mask(self):
+        enabled = np.ones((9, 10), dtype=bool)
+        for maze_class in [BinaryTree, SideWinder, Eller]:
+            generator = TiledGenerator(maze_class, tile_rows=4)
+            self.assert_perfect_per_component(generator.generate_passages(enabled, seed=2), enabled)
+            enabled[4, 4] = False
+            with self.assertRaises(Exception):
+                generator.generate_passages(enabled, seed=2)
+            enabled[4, 4] = True
+
+    def test_same_output_for_any_number_of_workers(self):
+        maze = RecursiveBackTracker(9, 9, array_backed=True)
+        maze.disable_cell(4, 4)
+        maze.apply_tiled_algorithm(tile_rows=3, seed=5)
+        single = maze.get_passage_array().copy()
+        maze.apply_tiled_algorithm(tile_rows=3, workers=2, seed=5)
+        self.assertTrue(np.array_equal(single, maze.get_passage_array()))
+        self.assert_perfect_per_component(single, maze.get_enabled_array())
+
+    def test_speckled_mask(self):
+        random.seed(7)
+        state = random.getstate()
+        enabled = np.random.default_rng(2).random((40, 40)) < 0.5
+        labels, count = label_components(enabled)
+        self.assertGreater(count, 100)
+        self.assertTrue(np.array_equal(labels >= 0, enabled))
+        for maze_class in [RecursiveBackTracker, Wilson, HuntAndKill]:
+            passages = TiledGenerator(maze_class, tile_rows=16).generate_passages(enabled, seed=4)
+            self.assert_perfect_per_component(passages, enabled)
+        # Tiles draw from their own random.Random
+        self.assertEqual(random.getstate(), state)
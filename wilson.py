@@ -1,42 +1,141 @@
 import random
-from PIL import Image
-from typing import List
+import numpy as np
+from array import array
+from typing import Dict, List, Tuple
 from maze_fun.maze import MazeGrid
 from maze_fun.cell import Cell
+from maze_fun.enabled_cell_index import EnabledCellIndex
+from maze_fun.array_grid import NORTH, SOUTH, EAST, WEST, OPPOSITE
 
 
 class Wilson(MazeGrid):
-    def apply_algorithm(self) -> Image:
-        frames = [self.create_maze_image()]
-        unvisted = set()
-        for row in self.each_row():
-            for col in self.each_col():
-                unvisted.add(self[row, col])
-        first = random.sample(unvisted, 1)[0]
-        unvisted.remove(first)
-        while unvisted:
-            print('Length of unvisited is ' + str(len(unvisted)))
-            cell = random.sample(unvisted, 1)[0] # type: Cell
-            path = [cell]  # type: List[Cell]
-
-            while cell in unvisted:
-                random_neighbor = cell.get_random_neighbor()
-                if random_neighbor in path:
-                    index = path.index(random_neighbor)
-                    path = path[0:index]
+    """ Uniform spanning tree mazes built from loop-erased random walks.
+    The enabled cells have to be connected for the walks to reach the tree.
+    """
+    def generate_steps(self):
+        unvisited = self.enabled_index.copy()
+        first = unvisited[self.rng.randrange(len(unvisited))]
+        unvisited.remove(*first)
+        while len(unvisited):
+            cell = self[unvisited[self.rng.randrange(len(unvisited))]]
+            path, _ = self.loop_erased_walk(cell, unvisited, self.rng)
+            for i, p in enumerate(path[0:-1]):
+                self.link_cells(p, path[i+1])
+                unvisited.remove(*p.pos)
+                yield
+
+    @staticmethod
+    def loop_erased_walk(cell: Cell, unvisited: EnabledCellIndex, rng=random) -> Tuple[List[Cell], int]:
+        """ Randomly walks from cell until it reaches a cell that isn't in unvisited, erasing loops as they form.
+        :return: The loop erased path, which ends on the first visited cell, and the number of steps walked
+        """
+        path = [cell]  # type: List[Cell]
+        path_index = {cell.pos: 0}  # type: Dict[Tuple[int, int], int]
+        steps = 0
+        while cell.pos in unvisited:
+            random_neighbor = cell.get_random_enabled_neighbor(rng)
+            steps += 1
+            if random_neighbor.pos in path_index:
+                # Erase the loop the walk just closed
+                index = path_index[random_neighbor.pos]
+                for erased in path[index + 1:]:
+                    del path_index[erased.pos]
+                del path[index + 1:]
+            else:
+                path_index[random_neighbor.pos] = len(path)
                 path.append(random_neighbor)
-                cell = random_neighbor
+            cell = random_neighbor
+        return path, steps
 
-            for i, p in enumerate(path[0:-1]):
-                p.link_two_cells(path[i+1])
-                unvisted.remove(p)
-            frames.append(self.create_maze_image())
+    def apply_fast_algorithm(self, seed=None, store_exit_directions: bool=True):
+        """ Production version of the algorithm that walks over flat cell indices and writes the passage array
+        directly, without cells, link listeners or frames.
+        :param seed: Seed for a random.Random, None uses the rng of the maze
+        :param store_exit_directions: Remember only the last direction each cell of a walk was left by and
+        retrace the walk from its start afterwards, which erases loops implicitly and needs one byte per cell.
+        Otherwise the walk is kept as a list with a position to path index map and loops are cut off as they form.
+        """
+        rand = random.Random(seed) if seed is not None else self.rng
+        neighbors, directions, degrees = self.get_neighbor_tables()
+        passages = bytearray(self.rows * self.cols)
+        in_tree = bytearray(self.rows * self.cols)
+        unvisited = self.enabled_index.copy()
+        cols = self.cols
+
+        root = unvisited.flat_index(*unvisited[rand.randrange(len(unvisited))])
+        in_tree[root] = 1
+        unvisited.remove(*divmod(root, cols))
+        exits = bytearray(self.rows * self.cols) if store_exit_directions else None
+
+        while len(unvisited):
+            start = unvisited.flat_index(*unvisited[rand.randrange(len(unvisited))])
+            if store_exit_directions:
+                current = start
+                while not in_tree[current]:
+                    exit_slot = 4 * current + rand.randrange(degrees[current])
+                    exits[current] = exit_slot & 3
+                    current = neighbors[exit_slot]
+                path_slots = []
+                current = start
+                while not in_tree[current]:
+                    exit_slot = 4 * current + exits[current]
+                    path_slots.append(exit_slot)
+                    in_tree[current] = 1
+                    current = neighbors[exit_slot]
+            else:
+                path = [start]
+                path_slots = []
+                path_index = {start: 0}
+                current = start
+                while not in_tree[current]:
+                    exit_slot = 4 * current + rand.randrange(degrees[current])
+                    current = neighbors[exit_slot]
+                    if current in path_index:
+                        index = path_index[current]
+                        for erased in path[index + 1:]:
+                            del path_index[erased]
+                        del path[index + 1:]
+                        del path_slots[index:]
+                    else:
+                        path_index[current] = len(path)
+                        path.append(current)
+                        path_slots.append(exit_slot)
+                for cell_index in path[:-1]:
+                    in_tree[cell_index] = 1
+
+            for exit_slot in path_slots:
+                cell_index = exit_slot // 4
+                direction = directions[exit_slot]
+                passages[cell_index] |= direction
+                passages[neighbors[exit_slot]] |= OPPOSITE[direction]
+                unvisited.remove(*divmod(cell_index, cols))
+
+        self.load_passage_array(np.frombuffer(passages, dtype=np.uint8).reshape(self.rows, self.cols).copy())
 
-        return frames
+    def get_neighbor_tables(self) -> Tuple[array, bytearray, bytearray]:
+        """
+        :return: (neighbors, directions, degrees) where slot 4 * i + k for k < degrees[i] holds the flat index of
+        the k-th enabled neighbor of enabled cell i and the passage bit pointing at it
+        """
+        size = self.rows * self.cols
+        enabled = self.get_enabled_array().ravel()
+        flat = np.arange(size)
+        rows, cols = np.divmod(flat, self.cols)
+        neighbors = np.zeros((size, 4), dtype=np.int64)
+        directions = np.zeros((size, 4), dtype=np.uint8)
+        degrees = np.zeros(size, dtype=np.int64)
+        for direction, offset, in_bounds in ((NORTH, -self.cols, rows > 0), (SOUTH, self.cols, rows < self.rows - 1),
+                                             (EAST, 1, cols < self.cols - 1), (WEST, -1, cols > 0)):
+            neighbor = np.clip(flat + offset, 0, size - 1)
+            valid = np.flatnonzero(in_bounds & enabled & enabled[neighbor])
+            neighbors[valid, degrees[valid]] = neighbor[valid]
+            directions[valid, degrees[valid]] = direction
+            degrees[valid] += 1
+        return (array('q', neighbors.ravel().tobytes()), bytearray(directions.ravel().tobytes()),
+                bytearray(degrees.astype(np.uint8).tobytes()))
 
 
 if __name__ == '__main__':
     random.seed(1)
     w = Wilson(10, 10)
-    frames = w.create_maze_path_frames()
-    w.create_gif_from_frames(frames, 'wilson.gif')
+    w.create_maze_path_frames('wilson.gif')